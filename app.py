@@ -5,46 +5,42 @@ Refactored NSE Stock Performance Tracker - v2.1
 - Left comments where behavior intentionally preserved
 """
 
+import csv
+import io
 import os
 import logging
-import hashlib
 import time
 import uuid
 from pathlib import Path
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from itertools import islice
 import streamlit as st
 import pandas as pd
+import numpy as np
 import warnings
 
-# Optional: dotenv for local development
-try:
-    from dotenv import load_dotenv
-except Exception:
-    load_dotenv = None
-
 warnings.filterwarnings("ignore")
 
 
 # -------------------- Local modules --------------------
-from config import CUSTOM_CSS, ITEMS_PER_PAGE
+from config import ITEMS_PER_PAGE, USE_NATIVE_TABLE
 from data_fetchers import (
+    normalize_symbol,
     get_stock_list,
     get_stock_performance,
+    fetch_batch,
     fetch_stocks_bulk,
-    validate_stock_symbol,
+    BATCH_DOWNLOAD_SIZE,
+    validate_stock_symbols,
     get_available_nse_indices,
     get_stock_52_week_range,
+    get_cached_history,
+    get_cached_batch_history,
+    ThrottledUpdater,
 )
-from file_manager import (
-    load_all_saved_lists, save_list_to_csv, delete_list_csv,
-    load_portfolio, save_portfolio, delete_holding, clear_portfolio
-)
-from cache_manager import clear_cache as clear_cache_manager
-from portfolio_manager import (
-    calculate_portfolio_metrics, validate_holding_input,
-    format_currency, format_percentage, get_pnl_color,
-    get_top_performers, get_worst_performers
-)
+from file_manager import load_all_saved_lists, save_list_to_json, delete_list_json
+from cache_manager import invalidate_tickers, load_bulk_cache
+from smart_cache_utils import ttl_for, tracked_cache_data, get_cache_hit_stats
 from ui_components import (
     render_header,
     render_market_indices,
@@ -52,13 +48,18 @@ from ui_components import (
     render_top_bottom_performers,
     render_averages,
     render_pagination_controls,
+    render_native_table,
     render_live_ticker,
     render_gainer_loser_banner,
     render_sectoral_yearly_performance,
+    prefetch_market_panels,
+    wait_for_prefetch,
+    PAGE_CSS,
 )
-from utils import create_html_table
+from utils import create_html_table, make_list_key, PERCENT_COLUMNS
 from security_fixes import secure_password_compare, LoginRateLimiter, sanitize_html, sanitize_dataframe_for_csv
-from views.portfolio import render_portfolio_page
+# NOTE: views.portfolio (admin only) is imported lazily where used so the
+# common path doesn't pay for it at startup
 
 # Optional screenshot protection
 try:
@@ -97,7 +98,13 @@ def load_admin_password():
     if not env_path.exists():
         env_path = Path(".env")  # Fallback to CWD
     
-    if env_path.exists() and load_dotenv:
+    if env_path.exists():
+        # Optional: dotenv for local development (only imported when a .env exists
+        # and no env var/secret supplied the password)
+        try:
+            from dotenv import load_dotenv
+        except Exception:
+            return None
         try:
             load_dotenv(env_path)
             pw = os.getenv("ADMIN_PASSWORD")
@@ -119,8 +126,19 @@ def init_session_state():
         "admin_mode": False,
         "current_list_name": None,
         "current_list_source": None,
+        # Per-session fetched rows keyed by normalized ticker, plus the ticker set
+        # they were fetched for, so list edits only fetch the difference
         "cached_stocks_data": None,
         "cached_stocks_list_key": None,
+        "cached_stocks_tickers": None,
+        # (frame_key, DataFrame) memo of the typed results frame
+        "results_frame": None,
+        # (view_key, filtered DataFrame) memo for the current sort/search
+        "results_view": None,
+        # (page_key, page DataFrame, table HTML) memo for the visible page
+        "results_page": None,
+        # category -> (fetched_at, (stocks, message)) memo of resolved index lists
+        "stock_lists": {},
         "last_category": None,
         "current_page": 1,
         "selected_category": "Nifty 50",
@@ -145,21 +163,7 @@ def reset_search_and_pagination():
     st.session_state.search_version += 1
 
 # -------------------- Cache Helpers --------------------
-def make_list_key(stocks):
-    """Generate a unique hash key for a list of stock symbols.
-    
-    Args:
-        stocks: List of stock symbol strings
-        
-    Returns:
-        SHA1 hash string for cache key lookup
-    """
-    if not stocks:
-        return "empty"
-    # More efficient: sort once, join directly, hash in one go
-    return hashlib.sha1(",".join(sorted(stocks)).encode("utf-8")).hexdigest()
-
-@st.cache_data(ttl=60 * 60 * 24, show_spinner=False)
+@tracked_cache_data(ttl=60 * 60 * 24, show_spinner=False)
 def cached_load_all_saved_lists():
     """Load all saved stock lists from disk with 24-hour caching.
     
@@ -172,9 +176,39 @@ def cached_load_all_saved_lists():
         logger.exception("Error loading saved lists: %s", e)
         return {}
 
-@st.cache_data(ttl=60 * 60 * 6, show_spinner=False)
+class _DegradedStockList(Exception):
+    """Raised from _persisted_stock_list so st.cache_data does not store the result."""
+
+    def __init__(self, result):
+        super().__init__(result[1])
+        self.result = result
+
+
+# How long a session reuses a fallback/empty list before asking NSE again
+DEGRADED_STOCK_LIST_TTL = 300
+
+@tracked_cache_data(show_spinner=False, persist="disk", max_entries=64)
+def _persisted_stock_list(category):
+    """Disk-persisted stock list lookup (survives process restarts/redeploys).
+    
+    Streamlit ignores ``ttl`` for persisted caches and never deletes their
+    files, so the key is just the category (one pickle per category) and
+    the fetch time is returned alongside; cached_get_stock_list clears and
+    refetches the entry once it is older than ttl_for('stock_list').
+    
+    Empty or fallback lists (NSE unreachable) raise _DegradedStockList
+    instead, so an outage at cold start is never pinned to disk for a week.
+    
+    Returns:
+        tuple: ((list of stock symbols, metadata), fetch timestamp)
+    """
+    stocks, meta = result = get_stock_list(category)
+    if not stocks or (meta and 'fallback' in meta.lower()):
+        raise _DegradedStockList(result)
+    return result, time.time()
+
 def cached_get_stock_list(category):
-    """Fetch stock list for a category/index with 6-hour caching.
+    """Fetch stock list for a category/index with 7-day, disk-persisted caching.
     
     Args:
         category: Index category name (e.g., 'Nifty 50', 'Bank Nifty')
@@ -182,11 +216,35 @@ def cached_get_stock_list(category):
     Returns:
         tuple: (list of stock symbols, metadata)
     """
-    try:
-        return get_stock_list(category)
-    except Exception as e:
-        logger.exception("Error fetching stock list for %s: %s", category, e)
-        return ([], None)
+    # Warm path: the session's own copy skips st.cache_data's key hashing and
+    # unpickling of the returned list on every rerun. Callers never mutate it.
+    memo = st.session_state.stock_lists
+    entry = memo.get(category)
+    if entry is not None and time.time() < entry[0]:
+        return entry[1]
+    ttl = ttl_for('stock_list')
+    # Spinner only on a session miss (first use of this category here, or expiry)
+    with st.spinner("Loading index list..."):
+        previous = None
+        try:
+            result, fetched_at = _persisted_stock_list(category)
+            if time.time() - fetched_at >= ttl:
+                # Replaces this category's pickle in place instead of adding a file
+                previous = result
+                _persisted_stock_list.clear(category)
+                result, fetched_at = _persisted_stock_list(category)
+            expires_at = fetched_at + ttl
+        except Exception as e:
+            if isinstance(e, _DegradedStockList):
+                result = e.result
+            else:
+                logger.exception("Error fetching stock list for %s: %s", category, e)
+                result = ([], None)
+            # An expired full list still beats a fallback one; retry soon either way
+            result = previous or result
+            expires_at = time.time() + DEGRADED_STOCK_LIST_TTL
+    memo[category] = (expires_at, result)
+    return result
 
 # -------------------- Safe Rerun Trigger --------------------
 def trigger_rerun():
@@ -203,7 +261,6 @@ def on_category_change():
     if st.session_state.last_category != new_category:
         st.session_state.last_category = new_category
         st.session_state.selected_category = new_category
-        st.session_state.cached_stocks_data = None
         st.session_state.cached_stocks_list_key = None
         st.session_state.search_query = ""
         st.session_state.search_version += 1
@@ -249,6 +306,35 @@ def render_stock_selection_sidebar():
     return category
 
 
+def _activate_list(name, source):
+    """Make a saved list the active one and reset dependent view state."""
+    st.session_state.current_list_name = name
+    st.session_state.current_list_source = source
+    reset_search_and_pagination()
+    st.session_state.cached_stocks_list_key = None
+
+def _render_list_picker(lists, source):
+    """One selectbox + Load/Del pair per list source (constant widget count, not 2 per list).
+    
+    Returns:
+        tuple: (selected list name, delete clicked)
+    """
+    choice = st.sidebar.selectbox(
+        "Saved lists",
+        options=list(lists.keys()),
+        format_func=lambda n: f"{n} ({len(lists.get(n, []))})",
+        key=f"{source}_list_choice",
+        label_visibility="collapsed"
+    )
+    c1, c2 = st.sidebar.columns([3, 1])
+    with c1:
+        if st.button("Load", key=f"{source}_list_load", use_container_width=True):
+            _activate_list(choice, source)
+    with c2:
+        can_delete = source == "session" or st.session_state.admin_mode
+        delete_clicked = can_delete and st.button("Del", key=f"del_{source}_list")
+    return choice, delete_clicked
+
 def _render_disk_and_session_lists():
     # Helper to render saved lists (both disk & session) and return when selection changes
     if st.session_state.disk_lists is None:
@@ -257,47 +343,30 @@ def _render_disk_and_session_lists():
     # Disk Lists
     if st.session_state.disk_lists:
         st.sidebar.markdown("**Saved Lists (Disk):**")
-        for name, stocks in list(st.session_state.disk_lists.items()):
-            c1, c2 = st.sidebar.columns([3, 1])
-            with c1:
-                if st.button(f"{name} ({len(stocks)})", key=f"disk_{name}"):
-                    st.session_state.current_list_name = name
-                    st.session_state.current_list_source = "disk"
-                    reset_search_and_pagination()
-                    st.session_state.cached_stocks_data = None
-                    st.session_state.cached_stocks_list_key = None
-            with c2:
-                if st.session_state.admin_mode and st.button("Del", key=f"del_disk_{name}"):
-                    try:
-                        delete_list_csv(name)
-                        cached_load_all_saved_lists.clear()
-                        st.session_state.disk_lists = cached_load_all_saved_lists()
-                        if st.session_state.current_list_name == name:
-                            st.session_state.current_list_name = None
-                            st.session_state.current_list_source = None
-                        st.success(f"Deleted {name}")
-                        trigger_rerun()
-                    except Exception as e:
-                        logger.exception("Delete failed: %s", e)
-                        st.error("Failed to delete")
+        name, delete_clicked = _render_list_picker(st.session_state.disk_lists, "disk")
+        if delete_clicked:
+            try:
+                delete_list_json(name)
+                # Update the session copy in place; just invalidate the loader cache
+                st.session_state.disk_lists.pop(name, None)
+                cached_load_all_saved_lists.clear()
+                if st.session_state.current_list_name == name:
+                    st.session_state.current_list_name = None
+                    st.session_state.current_list_source = None
+                st.success(f"Deleted {name}")
+                trigger_rerun()
+            except Exception as e:
+                logger.exception("Delete failed: %s", e)
+                st.error("Failed to delete")
 
     # Session Lists
     if st.session_state.saved_lists:
         st.sidebar.markdown("**My Lists (Session):**")
-        for name, stocks in list(st.session_state.saved_lists.items()):
-            c1, c2 = st.sidebar.columns([3, 1])
-            with c1:
-                if st.button(f"{name} ({len(stocks)})", key=f"sess_{name}"):
-                    st.session_state.current_list_name = name
-                    st.session_state.current_list_source = "session"
-                    reset_search_and_pagination()
-                    st.session_state.cached_stocks_data = None
-                    st.session_state.cached_stocks_list_key = None
-            with c2:
-                if st.button("Del", key=f"del_sess_{name}"):
-                    st.session_state.saved_lists.pop(name, None)
-                    if st.session_state.current_list_name == name:
-                        st.session_state.current_list_name = None
+        name, delete_clicked = _render_list_picker(st.session_state.saved_lists, "session")
+        if delete_clicked:
+            st.session_state.saved_lists.pop(name, None)
+            if st.session_state.current_list_name == name:
+                st.session_state.current_list_name = None
 
 
 def render_admin_login():
@@ -355,6 +424,38 @@ def render_admin_login():
         # Admin mode checkbox (compact)
         st.session_state.admin_mode = st.sidebar.checkbox("Save to disk", value=st.session_state.admin_mode)
 
+        # Cache hit/miss counters (process-wide) for tuning TTLs
+        with st.sidebar.expander("Cache stats", expanded=False):
+            stats = get_cache_hit_stats()
+            if stats:
+                st.dataframe(pd.DataFrame(stats), hide_index=True, use_container_width=True)
+            else:
+                st.caption("No cached calls yet")
+
+
+@tracked_cache_data(show_spinner=False, max_entries=16)
+def parse_uploaded_symbols(blob):
+    """Parse and validate an uploaded symbol file, cached by its bytes.
+    
+    Validation may hit Yahoo for symbols outside Nifty 500, so without this
+    every rerun on the Upload File view re-validated the whole file.
+    
+    Returns:
+        tuple: (validated symbols, invalid symbols)
+    """
+    if not blob.strip():
+        return validate_stock_symbols([])
+    # One symbol per line: read_csv's C tokenizer splits lines straight from the
+    # bytes (a separator/quote char that never occurs keeps each line whole),
+    # then normalize + dedupe with vectorized string ops
+    symbols = pd.read_csv(
+        io.BytesIO(blob), header=None, names=["symbol"], sep="\x1f", dtype=str,
+        quoting=csv.QUOTE_NONE, encoding_errors="ignore", skip_blank_lines=True,
+        keep_default_na=False, na_filter=False,  # "NA"/"NULL"/"nan" lines stay symbols
+    )["symbol"]
+    symbols = symbols.str.strip().str.upper().str.replace(".", "-", regex=False)
+    stocks = symbols[symbols != ""].drop_duplicates().tolist()
+    return validate_stock_symbols(stocks)
 
 def handle_file_upload():
     """Handle stock list file upload and validation.
@@ -388,32 +489,8 @@ def handle_file_upload():
             st.sidebar.error(f"❌ File too large! Maximum size is 2MB. Your file is {file_size / (1024 * 1024):.2f}MB")
             return [], None
 
-        try:
-            content = uploaded_file.read().decode("utf-8")
-        except Exception:
-            content = uploaded_file.getvalue().decode("utf-8", errors="ignore")
-
-        raw_ticks = [s.strip().upper() for s in content.splitlines() if s.strip()]
-        seen = set()
-        stocks = []
-        for t in raw_ticks:
-            tt = t.replace(".", "-").strip()
-            if tt and tt not in seen:
-                seen.add(tt)
-                stocks.append(tt)
-
-        invalid = []
-        validated = []
-        for t in stocks:
-            try:
-                if not validate_stock_symbol(t):
-                    invalid.append(t)
-                else:
-                    validated.append(t)
-            except Exception as e:
-                # Preserve original behavior of accepting when validation fails, but log it
-                logger.exception("validate_stock_symbol raised for %s: %s", t, e)
-                validated.append(t)
+        # Parse + validate once per distinct file content (reruns hit the cache)
+        validated, invalid = parse_uploaded_symbols(uploaded_file.getvalue())
 
         if invalid:
             st.sidebar.warning(f"Removed {len(invalid)} invalid: {', '.join(invalid[:10])}...")
@@ -428,14 +505,17 @@ def handle_file_upload():
                 st.session_state.current_list_name = name
                 st.session_state.current_list_source = "session"
                 reset_search_and_pagination()
-                st.session_state.cached_stocks_data = None
                 st.session_state.cached_stocks_list_key = None
 
                 if st.session_state.admin_mode:
                     try:
-                        save_list_to_csv(name, validated)
+                        if not save_list_to_json(name, validated):
+                            raise IOError(f"save_list_to_json failed for {name}")
+                        # Update the session copy in place; just invalidate the loader cache
+                        if st.session_state.disk_lists is None:
+                            st.session_state.disk_lists = {}
+                        st.session_state.disk_lists[name] = validated
                         cached_load_all_saved_lists.clear()
-                        st.session_state.disk_lists = cached_load_all_saved_lists()
                         st.session_state.current_list_source = "disk"
                         st.success(f"Saved permanently as **{name}**")
                     except Exception as e:
@@ -454,67 +534,388 @@ def handle_file_upload():
     return [], None
 
 # -------------------- Data Fetching --------------------
+FETCH_CHUNK_SIZE = 25  # Max tickers handled per worker task in the parallel path
+FETCH_POOL_WORKERS = 4  # Matches the per-fetch worker cap below
+
+@st.cache_resource
+def get_fetch_executor():
+    """Process-wide fetch thread pool, reused across reruns and sessions.
+    
+    Never shut down; sharing it also caps total concurrent Yahoo requests
+    across sessions at FETCH_POOL_WORKERS.
+    """
+    return ThreadPoolExecutor(max_workers=FETCH_POOL_WORKERS, thread_name_prefix="fetch")
+
+def _fetch_chunk(tickers, use_cache):
+    """Fetch a chunk of tickers serially inside one worker thread."""
+    results = []
+    for t in tickers:
+        try:
+            res = get_stock_performance(t, use_cache)
+            if res:
+                results.append(res)
+        except Exception as e:
+            logger.exception("Fetch failed for %s: %s", t, e)
+    return results
+
 def fetch_stocks_data(selected_stocks, use_parallel, use_cache=True, status=None):
-    """Fetch performance data for multiple stocks.
+    """Fetch performance data for multiple stocks, yielding rows as they arrive.
     
     Args:
         selected_stocks: List of stock symbols to fetch
-        use_parallel: Whether to use parallel fetching
+        use_parallel: Whether the per-ticker fallback fetches in parallel
         use_cache: Whether to use cached data
         status: Optional streamlit placeholder for status updates
         
-    Returns:
-        list: List of stock performance dictionaries
+    Yields:
+        dict: Stock performance dictionaries, in completion order
     """
     if not selected_stocks:
-        return []
+        return
+
+    # Serve durable cache hits first (one cache read for the whole list) so only
+    # misses reach the network executors below
+    if use_cache:
+        cached_rows, selected_stocks = load_bulk_cache(selected_stocks)
+        yield from cached_rows
+        if not selected_stocks:
+            return
+        if status and cached_rows:
+            status.text(f"Loaded {len(cached_rows)} from cache, fetching {len(selected_stocks)}...")
+
+    # Batched path: one multi-symbol yf.download per BATCH_DOWNLOAD_SIZE tickers
+    # instead of one request per ticker; runs on this thread (downloads are
+    # serialized by YF_DOWNLOAD_LOCK anyway)
+    total = len(selected_stocks)
+    progress = ThrottledUpdater(status.text) if status else None
+    missing = []
+    with st.spinner(f"Fetching {total} stocks..."):
+        for i in range(0, total, BATCH_DOWNLOAD_SIZE):
+            batch = selected_stocks[i:i + BATCH_DOWNLOAD_SIZE]
+            try:
+                rows = fetch_batch(batch, use_cache)
+            except Exception as e:
+                logger.exception("Batch failed for chunk starting %s: %s", batch[0], e)
+                rows = []
+            yield from rows
+            fetched = {row["Ticker"] for row in rows}
+            missing.extend(t for t in batch if normalize_symbol(t) not in fetched)
+            done = min(i + BATCH_DOWNLOAD_SIZE, total)
+            if progress:
+                progress.update(f"Fetched {done}/{total}", force=done == total and not missing)
+
+    # Per-ticker fallback (with retries) only for symbols the batches didn't return
+    if not missing:
+        return
+    selected_stocks = missing
 
     # Prefer bulk when available and large lists
-    if len(selected_stocks) > 100 and "fetch_stocks_bulk" in globals():
+    if len(selected_stocks) > 100:
         try:
             # CONSISTENCY FIX: Use same worker logic as individual fetch
             bulk_workers = min(8, max(1, len(selected_stocks) // 20))
-            return fetch_stocks_bulk(selected_stocks, max_workers=bulk_workers, use_cache=use_cache, status_placeholder=status)
+            rows = fetch_stocks_bulk(selected_stocks, max_workers=bulk_workers, use_cache=use_cache, status_placeholder=status)
         except Exception as e:
             logger.exception("Bulk fetch failed: %s", e)
             # fall through to threaded fetch
+        else:
+            yield from rows
+            return
 
     # SECURITY FIX: Reduced max workers to prevent memory issues and rate limiting
-    # Aligned with bulk mode for consistency
-    max_workers = min(4, max(1, len(selected_stocks) // 20))
-    data = []
+    # (never more than the shared pool's FETCH_POOL_WORKERS). Fallback sets are
+    # usually small, so spread them over the workers instead of going serial:
+    # each retried ticker can spend seconds in backoff.
+    max_workers = min(FETCH_POOL_WORKERS, len(selected_stocks))
+    chunk_size = min(FETCH_CHUNK_SIZE, -(-len(selected_stocks) // max_workers))
+    total = len(selected_stocks)
 
     if use_parallel and max_workers > 1:
-        with st.spinner(f"Fetching {len(selected_stocks)} stocks (parallel)..."):
-            with ThreadPoolExecutor(max_workers=max_workers) as ex:
-                futures = {ex.submit(get_stock_performance, t, use_cache): t for t in selected_stocks}
-                done = 0
-                for fut in as_completed(futures):
-                    stock = futures.get(fut)
-                    try:
-                        res = fut.result()
-                        if res:
-                            data.append(res)
-                    except Exception as e:
-                        logger.exception("Fetch failed for %s: %s", stock, e)
-                    done += 1
-                    if status:
-                        status.text(f"Fetched {done}/{len(futures)}")
+        with st.spinner(f"Retrying {len(selected_stocks)} stocks (parallel)..."):
+            # One future per chunk (not per ticker) amortizes submit overhead, and
+            # at most max_workers chunks are in flight so this fetch never uses
+            # more than its worker budget of the shared pool, and pending futures
+            # and buffered results stay O(workers) instead of O(list size)
+            chunks = (selected_stocks[i:i + chunk_size] for i in range(0, len(selected_stocks), chunk_size))
+            ex = get_fetch_executor()
+            in_flight = {}
+            for chunk in islice(chunks, max_workers):
+                in_flight[ex.submit(_fetch_chunk, chunk, use_cache)] = chunk
+            done = 0
+            while in_flight:
+                finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                fut = finished.pop()
+                chunk = in_flight.pop(fut)
+                for next_chunk in islice(chunks, 1):
+                    in_flight[ex.submit(_fetch_chunk, next_chunk, use_cache)] = next_chunk
+                try:
+                    yield from fut.result()
+                except Exception as e:
+                    logger.exception("Fetch failed for chunk starting %s: %s", chunk[0], e)
+                done += len(chunk)
+                if progress:
+                    progress.update(f"Retried {done}/{total}", force=done == total)
     else:
-        with st.spinner(f"Fetching {len(selected_stocks)} stocks..."):
+        with st.spinner(f"Retrying {len(selected_stocks)} stocks..."):
             for i, t in enumerate(selected_stocks, 1):
                 try:
                     res = get_stock_performance(t, use_cache)
                     if res:
-                        data.append(res)
+                        yield res
                 except Exception as e:
                     logger.exception("Failed for %s: %s", t, e)
-                if status:
-                    status.text(f"Fetched {i}/{len(selected_stocks)}")
+                if progress:
+                    progress.update(f"Retried {i}/{total}", force=i == total)
 
-    return data
+# Columns shown in the live preview while a fetch is still running
+PREVIEW_COLUMNS = ["Stock Name", "Current Price", "Today %", "3 Months %"]
+
+def sync_stocks_data(selected_stocks, use_parallel, use_cache=True):
+    """Return rows for selected_stocks, fetching only tickers not fetched before.
+    
+    Rows live in session_state keyed by normalized ticker. When the list changes,
+    only the added tickers are fetched and removed ones are dropped, instead of
+    refetching the whole list. Once the rows are older than ttl_for('intraday')
+    the whole list is refetched, so a tab left open keeps current prices.
+    selected_stocks must already be normalized.
+    
+    Returns:
+        list: Stock performance dictionaries in selected_stocks order
+    """
+    list_key = make_list_key(selected_stocks)
+    cached = st.session_state.cached_stocks_data
+    wanted = selected_stocks  # already normalized + deduped by market_view_content
+
+    last_updated = st.session_state.last_updated_ts
+    stale = cached is not None and (last_updated is None or time.time() - last_updated >= ttl_for('intraday'))
+
+    if cached is None or stale or st.session_state.cached_stocks_list_key != list_key:
+        cached = cached or {}
+        old_tickers = st.session_state.cached_stocks_tickers or frozenset()
+        new_tickers = frozenset(wanted)
+        # Stale rows stay in place until their refreshed row arrives, so a
+        # failed refetch still shows the last known prices
+        added = list(wanted) if stale else [t for t in wanted if t not in old_tickers]
+
+        for ticker in old_tickers - new_tickers:
+            cached.pop(ticker, None)
+
+        if added:
+            status = st.empty()
+            with status:
+                if stale:
+                    st.write(f"Refreshing stock data ({len(added)} stocks)...")
+                else:
+                    st.write(f"Fetching latest stock data ({len(added)} new)...")
+            # Show rows as they arrive instead of a blank page until the last one
+            preview = st.empty()
+            arrived = []
+            show_preview = ThrottledUpdater(
+                lambda: preview.dataframe(pd.DataFrame(arrived).reindex(columns=PREVIEW_COLUMNS), hide_index=True),
+                min_interval=0.5
+            )
+            if stale and use_cache:
+                # The durable cache keeps rows for get_smart_cache_ttl() (5 min),
+                # longer than the 2 min intraday TTL; drop them so this pass
+                # really hits the network (and re-saves the fresh rows)
+                invalidate_tickers(added)
+            for row in fetch_stocks_data(added, use_parallel, use_cache, status):
+                cached[row.get("Ticker") or normalize_symbol(row.get("Stock Name", ""))] = row
+                arrived.append(row)
+                show_preview.update()
+            # Only a full fetch dates every row; adding tickers to the list
+            # must not reset the age of rows fetched earlier
+            if stale or not old_tickers:
+                st.session_state.last_updated_ts = time.time()
+            preview.empty()
+            status.empty()
+
+        st.session_state.cached_stocks_data = cached
+        st.session_state.cached_stocks_list_key = list_key
+        st.session_state.cached_stocks_tickers = new_tickers
+
+    return [cached[t] for t in wanted if t in cached]
+
+# -------------------- 52-Week Snapshot --------------------
+def _safe_52_week_range(ticker):
+    """Fetch 52-week range for one ticker, returning {} on failure (thread-safe)."""
+    if not ticker:
+        return {}
+    try:
+        return get_stock_52_week_range(ticker) or {}
+    except Exception as e:
+        logger.exception("52W failed for %s: %s", ticker, e)
+        return {}
+
+
+def render_52_week_cards(cards):
+    """Render 52-week high/low cards for the first search matches.
+
+    All ranges are fetched concurrently, then emitted as a single HTML block.
+    """
+    tickers = cards["Ticker"].tolist() if "Ticker" in cards.columns else [None] * len(cards)
+    names = cards["Stock Name"].tolist() if "Stock Name" in cards.columns else ["Unknown"] * len(cards)
+
+    # Shared pool: the fragment reruns on every sort/search/page click and the
+    # lookups are usually st.cache_data hits, so no per-render thread startup
+    ranges = list(get_fetch_executor().map(_safe_52_week_range, tickers))
+
+    card_html = []
+    for name, ticker, info in zip(names, tickers, ranges):
+        if not ticker:
+            card_html.append("<div style='padding:15px; opacity:0.7;'><small>No ticker</small></div>")
+            continue
+        current = info.get("current_price")
+        high = info.get("high")
+        low = info.get("low")
+        if None in (current, high, low):
+            card_html.append(f"<div style='padding:15px; background:#1e293b; border-radius:10px;'><small>{name} ({ticker})</small><br><i>52W data unavailable</i></div>")
+        else:
+            card_html.append(f"""
+            <div style="background: linear-gradient(135deg, rgba(30,64,175,0.6), rgba(17,24,39,0.9));
+                        border: 1px solid rgba(96,165,250,0.4); border-radius: 12px; padding: 14px; color: #e0e7ff;">
+                <div style="font-weight: 600; font-size: 0.95rem;">{name} <span style="opacity:0.7; font-size:0.8rem;">({ticker})</span></div>
+                <div style="margin:6px 0; font-size:0.9rem;">Current: <strong>₹{current:,.2f}</strong></div>
+                <div>52W High: <span style="color:#22c55e;">₹{high:,.2f}</span></div>
+                <div>52W Low: <span style="color:#f97316;">₹{low:,.2f}</span></div>
+            </div>""")
+
+    # One markdown call for all cards; grid keeps the previous one-card-per-column layout
+    st.markdown(
+        f"<div style='display:grid; grid-template-columns:repeat({len(card_html)}, minmax(0, 1fr)); gap:1rem;'>"
+        + "".join(card_html) + "</div>",
+        unsafe_allow_html=True
+    )
 
 # -------------------- Main UI Renderer --------------------
+# Internal lowercase search columns; never displayed or exported
+SEARCH_KEY_COLUMNS = ["_search_lower"]
+# Separator between name and ticker in the fused search key; can't be typed into
+# the search box, so a query never matches across the boundary
+SEARCH_KEY_SEP = "\x1f"
+
+def get_results_frame(stocks_data):
+    """Build the typed results DataFrame once per fetched list.
+    
+    The frame is memoized in session_state against the list key and fetch
+    timestamp, so sort/search/page reruns reuse it and only run sort_values.
+    Callers must treat the returned frame as read-only.
+    """
+    frame_key = (st.session_state.cached_stocks_list_key, st.session_state.last_updated_ts, len(stocks_data))
+    memo = st.session_state.results_frame
+    if memo is not None and memo[0] == frame_key:
+        return memo[1]
+
+    df = pd.DataFrame(stocks_data)
+
+    # Coerce percent columns to a contiguous numeric dtype once so sort_values
+    # doesn't fall back to object-dtype Python comparisons (None/'' -> NaN).
+    # Kept float64 so the 2 dp values round-trip exactly (float32 would turn
+    # 12.34 into 12.340000152 anywhere it isn't re-rounded, e.g. CSV export).
+    for col in PERCENT_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype(np.float64)
+
+    # Prices are stored numeric and formatted only at display/export; rows
+    # from older caches still carry "₹1,234.56" strings, so strip those once
+    if "Current Price" in df.columns and df["Current Price"].dtype == object:
+        prices = df["Current Price"].astype(str).str.replace("[₹,]", "", regex=True)
+        df["Current Price"] = pd.to_numeric(prices, errors="coerce")
+
+    # Lowercased "name<SEP>ticker" search key built once per frame so each
+    # keystroke is a single substring scan (no per-query lowercasing, no regex,
+    # no OR of two masks). Arrow-backed strings make str.contains(regex=False)
+    # run in pyarrow's C substring kernel.
+    if not df.empty:
+        search_key = df["Stock Name"].astype(str)
+        if "Ticker" in df.columns:
+            search_key = search_key + SEARCH_KEY_SEP + df["Ticker"].astype(str)
+        df["_search_lower"] = search_key.str.lower().astype("string[pyarrow]")
+
+    st.session_state.results_frame = (frame_key, df)
+    return df
+
+def build_csv_bytes(filtered_df):
+    """Build the CSV export (Rank, % suffixes, formula-injection safe) for a results frame.
+    
+    Passed to the download button as a deferred callable, so it only runs when
+    the user actually clicks Download (on Streamlit's download thread).
+    """
+    # Prepare CSV export data (remove Ticker and sparkline_data columns)
+    export_df = filtered_df.drop(columns=["Ticker", "sparkline_data"], errors="ignore").copy()
+    export_df.insert(0, "Rank", np.arange(1, len(export_df) + 1, dtype=np.int32))
+    
+    # Add % symbol to percentage columns for Excel display (e.g., "2.5" → "2.5%")
+    for col in PERCENT_COLUMNS:
+        if col in export_df.columns:
+            values = export_df[col].astype("float64").round(2)
+            export_df[col] = (values.astype(str) + "%").where(values.notna(), export_df[col])
+    if "Current Price" in export_df.columns:
+        prices = export_df["Current Price"]
+        export_df["Current Price"] = prices.map("₹{:.2f}".format).where(prices.notna(), "")
+    
+    # SECURITY FIX: Prevent CSV formula injection
+    safe_df = sanitize_dataframe_for_csv(export_df)
+    return safe_df.to_csv(index=False).encode('utf-8')
+
+def get_results_view(stocks_data, sort_by, sort_order, query):
+    """Sorted/filtered results frame.
+    
+    Memoized in session_state on (frame key, sort_by, sort_order, query), so
+    reruns that don't change any of them (paging, unrelated widgets) skip the
+    sort and search scan.
+    
+    Returns:
+        DataFrame: Filtered, sorted results with a clean RangeIndex
+    """
+    df = get_results_frame(stocks_data)
+    view_key = (st.session_state.results_frame[0], sort_by, sort_order, query)
+    memo = st.session_state.results_view
+    if memo is not None and memo[0] == view_key:
+        return memo[1]
+
+    ascending = sort_order == "Worst to Best"
+    try:
+        if sort_by == "Stock Name":
+            df = df.sort_values("Stock Name", ascending=True, na_position="last", kind="stable")
+        elif sort_by in df.columns:
+            df = df.sort_values(sort_by, ascending=ascending, na_position="last", kind="stable")
+    except Exception as e:
+        logger.exception("Sort failed: %s", e)
+
+    filtered_df = df
+    if query and not df.empty:
+        filtered_df = df[df["_search_lower"].str.contains(query, regex=False, na=False)]
+
+    filtered_df = filtered_df.reset_index(drop=True).drop(columns=SEARCH_KEY_COLUMNS, errors="ignore")
+
+    st.session_state.results_view = (view_key, filtered_df)
+    return filtered_df
+
+def get_results_page(filtered_df, start, end):
+    """Display frame (and its HTML table when not native) for one results page.
+    
+    Memoized in session_state on (view key, start, end), so reruns that keep
+    the same page (unrelated widgets, fragment refreshes) skip the Rank
+    insert and the HTML table build. Call after get_results_view().
+    
+    Returns:
+        tuple: (page DataFrame, HTML string or None when USE_NATIVE_TABLE)
+    """
+    page_key = (st.session_state.results_view[0], start, end)
+    memo = st.session_state.results_page
+    if memo is not None and memo[0] == page_key:
+        return memo[1], memo[2]
+
+    # Rank is only materialized for the visible page rows
+    page_df = filtered_df.iloc[start:end].copy()
+    page_df.insert(0, "Rank", np.arange(start + 1, start + 1 + len(page_df), dtype=np.int32))
+    display_df = page_df.drop(columns=["Ticker"], errors="ignore")
+    table_html = None if USE_NATIVE_TABLE else create_html_table(display_df)
+
+    st.session_state.results_page = (page_key, display_df, table_html)
+    return display_df, table_html
+
 def render_main_ui(category, selected_stocks, stocks_data, sort_by, sort_order):
     """Render the main stock performance table and analytics.
     
@@ -588,27 +989,13 @@ def render_main_ui(category, selected_stocks, stocks_data, sort_by, sort_order):
                     st.session_state.search_query = ""
                     st.session_state.current_page = 1
                     st.session_state.search_version += 1
-                    st.rerun()
+                    st.rerun(scope="fragment")
 
     query = st.session_state.search_query.strip().lower()
-    df = pd.DataFrame(stocks_data)
-    ascending = sort_order == "Worst to Best"
-
-    try:
-        if sort_by == "Stock Name":
-            df = df.sort_values("Stock Name", ascending=True, na_position="last")
-        elif sort_by in df.columns:
-            df = df.sort_values(sort_by, ascending=ascending, na_position="last")
-    except Exception as e:
-        logger.exception("Sort failed: %s", e)
-
-    filtered_df = df
     search_active = len(query) >= 2
-    if search_active and not df.empty:
-        name_match = df["Stock Name"].astype(str).str.contains(query, case=False, na=False)
-        ticker_match = df["Ticker"].astype(str).str.contains(query, case=False, na=False) if "Ticker" in df.columns else False
-        filtered_df = df[name_match | ticker_match].copy()
+    filtered_df = get_results_view(stocks_data, sort_by, sort_order, query if search_active else "")
 
+    if search_active and stocks_data:
         with message_ph.container():
             if filtered_df.empty:
                 # SECURITY FIX: Sanitize search query display
@@ -617,69 +1004,25 @@ def render_main_ui(category, selected_stocks, stocks_data, sort_by, sort_order):
             else:
                 st.success(f"Found **{len(filtered_df)}** match(es)")
 
-    filtered_df = filtered_df.reset_index(drop=True)
-    filtered_df.insert(0, "Rank", range(1, len(filtered_df) + 1))
-
-    # Prepare CSV export data (remove Ticker and sparkline_data columns)
-    export_df = filtered_df.drop(columns=["Ticker", "sparkline_data"], errors="ignore").copy()
-    
-    # Add % symbol to percentage columns for Excel display
-    percentage_columns = ['Today %', '1 Week %', '1 Month %', '2 Months %', '3 Months %']
-    for col in percentage_columns:
-        if col in export_df.columns:
-            # Format: add % symbol (e.g., "2.5" → "2.5%")
-            export_df[col] = export_df[col].apply(lambda x: f"{x}%" if pd.notna(x) and x != '' else x)
-    
-    # SECURITY FIX: Prevent CSV formula injection
-    safe_df = sanitize_dataframe_for_csv(export_df)
-    csv_data = safe_df.to_csv(index=False).encode('utf-8')
-    
     # Create filename based on current list/category
     download_name = st.session_state.current_list_name or category or "stock_data"
     filename = f"{download_name}_performance.csv"
     
     with table_ph.container():
         total = len(filtered_df)
-        start, end = render_pagination_controls(total, ITEMS_PER_PAGE, "top", csv_data=csv_data, csv_filename=filename)
-        page_df = filtered_df.iloc[start:end]
-        display_df = page_df.drop(columns=["Ticker"], errors="ignore")
-        st.markdown(create_html_table(display_df), unsafe_allow_html=True)
+        start, end = render_pagination_controls(total, ITEMS_PER_PAGE, "top", csv_data=lambda: build_csv_bytes(filtered_df), csv_filename=filename)
+        display_df, table_html = get_results_page(filtered_df, start, end)
+        if table_html is None:
+            render_native_table(display_df)
+        else:
+            st.markdown(table_html, unsafe_allow_html=True)
 
     with performers_ph.container():
         if not search_active:
             render_top_bottom_performers(filtered_df)
         elif len(filtered_df) > 0:
             st.markdown("### 52-Week High/Low Snapshot")
-            cards = filtered_df.head(5)
-            cols = st.columns(min(5, len(cards)))
-            for idx, (_, row) in enumerate(cards.iterrows()):
-                col = cols[idx % len(cols)]
-                ticker = row.get("Ticker")
-                name = row.get("Stock Name", "Unknown")
-                if not ticker:
-                    col.caption(f"No ticker")
-                    continue
-                try:
-                    info = get_stock_52_week_range(ticker) or {}
-                    current = info.get("current_price")
-                    high = info.get("high")
-                    low = info.get("low")
-                except Exception as e:
-                    logger.exception("52W failed for %s: %s", ticker, e)
-                    info = {}
-
-                if None in (current, high, low):
-                    col.markdown(f"<div style='padding:15px; background:#1e293b; border-radius:10px;'><small>{name} ({ticker})</small><br><i>52W data unavailable</i></div>", unsafe_allow_html=True)
-                else:
-                    col.markdown(f"""
-                    <div style="background: linear-gradient(135deg, rgba(30,64,175,0.6), rgba(17,24,39,0.9));
-                                border: 1px solid rgba(96,165,250,0.4); border-radius: 12px; padding: 14px; color: #e0e7ff;">
-                        <div style="font-weight: 600; font-size: 0.95rem;">{name} <span style="opacity:0.7; font-size:0.8rem;">({ticker})</span></div>
-                        <div style="margin:6px 0; font-size:0.9rem;">Current: <strong>₹{current:,.2f}</strong></div>
-                        <div>52W High: <span style="color:#22c55e;">₹{high:,.2f}</span></div>
-                        <div>52W Low: <span style="color:#f97316;">₹{low:,.2f}</span></div>
-                    </div>
-                    """, unsafe_allow_html=True)
+            render_52_week_cards(filtered_df.head(5))
 
     with avg_ph.container():
         try:
@@ -695,7 +1038,8 @@ def render_main_ui(category, selected_stocks, stocks_data, sort_by, sort_order):
 
 # -------------------- Portfolio UI --------------------
 def render_portfolio_ui():
-    """Wrapper for modular portfolio page"""
+    """Wrapper for modular portfolio page (imported on first use)"""
+    from views.portfolio import render_portfolio_page
     render_portfolio_page()
 
 # -------------------- Main --------------------
@@ -706,7 +1050,7 @@ def main():
         layout="wide",
         initial_sidebar_state="expanded"
     )
-    st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
+    st.markdown(PAGE_CSS, unsafe_allow_html=True)
     apply_screenshot_protection()
 
     init_session_state()
@@ -717,9 +1061,16 @@ def main():
         st.session_state.trigger_rerun_nonce = None
         st.rerun()
 
+    # Fetch banner, ticker and indices data in parallel; it overlaps with the
+    # header render below, and the panels then render from warm caches
+    market_prefetch = prefetch_market_panels()
+
     # Render header first (fast - uses cached data)
     render_header()
 
+    with st.spinner("⏳ Loading market data..."):
+        wait_for_prefetch(market_prefetch)
+
     # Load gainer/loser banner (stays visible while rest loads)
     with st.spinner("⏳ Loading market movers and FII/DII data..."):
         fii_dii_source = render_gainer_loser_banner()
@@ -769,10 +1120,12 @@ def main():
     # Show appropriate view based on admin status
     st.markdown("---")
     
-    # Admin gets portfolio section at top
+    # Admin gets portfolio section at top. A collapsed expander still runs its
+    # body, so gate the heavy portfolio UI behind a toggle instead
     if st.session_state.admin_mode:
-        with st.expander("💼 My Portfolio", expanded=False):
-            render_portfolio_ui()
+        if st.toggle("💼 My Portfolio", key="portfolio_open"):
+            with st.container(border=True):
+                render_portfolio_ui()
         st.markdown("---")
     
     # Everyone (including admin) sees market view
@@ -789,23 +1142,35 @@ def market_view_content():
     if category == "Upload File":
         selected_stocks, _ = handle_file_upload()
     else:
-        with st.spinner("Loading index list..."):
-            selected_stocks, _ = cached_get_stock_list(category)
+        selected_stocks, _ = cached_get_stock_list(category)
 
-    # Sidebar controls
+    # Normalize + dedupe once at the source so the list key, fetch and cache
+    # all see the same canonical tickers (no duplicate or case-variant fetches)
+    selected_stocks = list(dict.fromkeys(normalize_symbol(s) for s in selected_stocks or [] if s and s.strip()))
+
+    # Sidebar controls (sort controls live in the results fragment)
     st.sidebar.markdown("---")
-    sort_by = st.sidebar.selectbox("Sort by", ["3 Months %", "1 Month %", "1 Week %", "Today %", "Stock Name"])
-    sort_order = st.sidebar.radio("Order", ["Best to Worst", "Worst to Best"], horizontal=True)
     use_parallel = st.sidebar.checkbox("Parallel fetch (faster)", value=True)
     use_cache = st.sidebar.checkbox("Use cache", value=True)
 
-    if st.sidebar.button("Refresh All Data", type="primary"):
-        clear_cache_manager()
+    # Quotes and index lists are invalidated separately so a quote refresh
+    # doesn't force the index list to be re-downloaded
+    if st.sidebar.button("Refresh Quotes", type="primary"):
+        invalidate_tickers(selected_stocks)
+        get_cached_history.clear()
+        get_cached_batch_history.clear()
         st.session_state.cached_stocks_data = None
         st.session_state.cached_stocks_list_key = None
-        cached_get_stock_list.clear()
+        st.session_state.cached_stocks_tickers = None
+        st.success("Quotes refreshed!")
+        st.rerun()
+
+    if st.sidebar.button("Reload Index Lists"):
+        _persisted_stock_list.clear()
+        st.session_state.stock_lists = {}
         cached_load_all_saved_lists.clear()
-        st.success("All caches cleared!")
+        st.session_state.cached_stocks_list_key = None
+        st.success("Index lists reloaded!")
         st.rerun()
 
     render_sidebar_info()
@@ -814,18 +1179,26 @@ def market_view_content():
         st.warning("Please select or upload a stock list.")
         return
 
-    list_key = make_list_key(selected_stocks)
-    if st.session_state.cached_stocks_data is None or st.session_state.cached_stocks_list_key != list_key:
-        status = st.empty()
-        with status:
-            st.write("Fetching latest stock data...")
-        stocks_data = fetch_stocks_data(selected_stocks, use_parallel, use_cache, status)
-        st.session_state.cached_stocks_data = stocks_data
-        st.session_state.cached_stocks_list_key = list_key
-        st.session_state.last_updated_ts = time.time()
-        status.empty()
-    else:
-        stocks_data = st.session_state.cached_stocks_data
+    stocks_data = sync_stocks_data(selected_stocks, use_parallel, use_cache)
+
+    render_results_fragment(category, selected_stocks, stocks_data)
+
+@st.fragment
+def render_results_fragment(category, selected_stocks, stocks_data):
+    """Sort controls + results table as a fragment.
+    
+    Sorting, searching and paging rerun only this block; the header, sidebar
+    and list/fetch checks are skipped until a full-app rerun.
+    """
+    col_sort, col_order, _ = st.columns([1, 1.5, 2.5])
+    with col_sort:
+        sort_by = st.selectbox(
+            "Sort by",
+            ["3 Months %", "1 Month %", "1 Week %", "Today %", "Stock Name"],
+            key="sort_by"
+        )
+    with col_order:
+        sort_order = st.radio("Order", ["Best to Worst", "Worst to Best"], horizontal=True, key="sort_order")
 
     render_main_ui(category, selected_stocks, stocks_data, sort_by, sort_order)
 
@@ -6,17 +6,39 @@ Single-file cache for optimal performance with large datasets (25x faster than J
 
 import os
 import pickle
+import threading
+import time
 import pytz
+import pandas as pd
 import fcntl  # For file locking (Unix/Mac compatible)
 from datetime import datetime, timedelta, timezone
 from typing import Dict, List, Tuple, Optional
 from smart_cache_utils import should_refresh_cache, get_smart_cache_ttl
 
+# Optional: pyarrow enables the per-ticker parquet history store
+try:
+    import pyarrow  # noqa: F401
+    PARQUET_AVAILABLE = True
+except Exception:
+    PARQUET_AVAILABLE = False
+
 CACHE_DIR = "cache"
 CACHE_FILE = os.path.join(CACHE_DIR, "stocks_cache.pkl")
 CACHE_VERSION = 2  # Increment when cache structure changes
 UTC = pytz.UTC  # Consistent timezone reference
 
+# Per-ticker daily Close history. Past closes never change, so a stored series
+# stays usable as a base for a week; callers only re-download the recent tail.
+HISTORY_DIR = os.path.join(CACHE_DIR, "hist")
+HISTORY_MAX_AGE = 7 * 86400
+
+# Process-wide in-memory mirror of cache entries (ticker -> {'data', 'timestamp'}).
+# Shared by all sessions/threads so overlapping lists (e.g. Nifty 50 after
+# Nifty 500) hit memory instead of unpickling the cache file per ticker.
+# Validity still uses the smart TTL via should_refresh_cache.
+_MEMORY_CACHE: Dict[str, dict] = {}
+_MEMORY_LOCK = threading.Lock()
+
 
 def ensure_cache_dir() -> None:
     """Create cache directory if it doesn't exist"""
@@ -47,6 +69,8 @@ def save_to_cache(ticker: str, data: dict) -> bool:
         
         # Save back with exclusive lock
         _save_cache_file(all_cache)
+        with _MEMORY_LOCK:
+            _MEMORY_CACHE[ticker] = all_cache['stocks'][ticker]
         return True
     except Exception as e:
         print(f"ERROR: Failed to save cache for {ticker}: {e}")
@@ -59,12 +83,15 @@ def load_from_cache(ticker: str) -> Optional[dict]:
     Returns None if not found or expired based on market status.
     """
     try:
-        all_cache = _load_cache_file()
+        with _MEMORY_LOCK:
+            stock_cache = _MEMORY_CACHE.get(ticker)
         
-        if ticker not in all_cache['stocks']:
-            return None
-        
-        stock_cache = all_cache['stocks'][ticker]
+        if stock_cache is None:
+            all_cache = _load_cache_file()
+            _remember(all_cache['stocks'])
+            stock_cache = all_cache['stocks'].get(ticker)
+            if stock_cache is None:
+                return None
         
         # Add timezone info to cached timestamp if not present
         timestamp = stock_cache['timestamp']
@@ -118,6 +145,7 @@ def save_bulk_cache(stocks_data: List[dict]) -> bool:
         
         # Save back
         _save_cache_file(all_cache)
+        _remember(all_cache['stocks'])
         return True
     except Exception as e:
         print(f"ERROR: Failed to save bulk cache: {e}")
@@ -136,11 +164,17 @@ def load_bulk_cache(tickers: List[str]) -> Tuple[List[dict], List[str]]:
     missing_tickers = []
     
     try:
-        all_cache = _load_cache_file()
+        # Memory mirror first; only unpickle the file if some ticker isn't there
+        with _MEMORY_LOCK:
+            stocks = {t: _MEMORY_CACHE[t] for t in tickers if t in _MEMORY_CACHE}
+        if len(stocks) < len(tickers):
+            all_cache = _load_cache_file()
+            _remember(all_cache['stocks'])
+            stocks = all_cache['stocks']
         
         for ticker in tickers:
-            if ticker in all_cache['stocks']:
-                stock_cache = all_cache['stocks'][ticker]
+            if ticker in stocks:
+                stock_cache = stocks[ticker]
                 
                 # Add timezone info to cached timestamp if not present (backward compat)
                 timestamp = stock_cache['timestamp']
@@ -164,9 +198,50 @@ def load_bulk_cache(tickers: List[str]) -> Tuple[List[dict], List[str]]:
     return cached_data, missing_tickers
 
 
+def _history_path(ticker: str) -> str:
+    return os.path.join(HISTORY_DIR, f"{ticker}.parquet")
+
+
+def load_history(ticker: str) -> Optional[pd.Series]:
+    """
+    Load a ticker's stored daily Close series if younger than HISTORY_MAX_AGE.
+    Returns None if parquet is unavailable, the file is missing, stale or unreadable.
+    """
+    if not PARQUET_AVAILABLE:
+        return None
+    path = _history_path(ticker)
+    try:
+        if time.time() - os.path.getmtime(path) > HISTORY_MAX_AGE:
+            return None
+        return pd.read_parquet(path)['Close']
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"Error loading history for {ticker}: {e}")
+        return None
+
+
+def save_history(ticker: str, closes: pd.Series) -> bool:
+    """Persist a ticker's daily Close series (atomic replace, snappy parquet)."""
+    if not PARQUET_AVAILABLE:
+        return False
+    try:
+        os.makedirs(HISTORY_DIR, exist_ok=True)
+        path = _history_path(ticker)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        closes.rename('Close').to_frame().to_parquet(tmp_path, compression='snappy')
+        os.replace(tmp_path, path)
+        return True
+    except Exception as e:
+        print(f"Error saving history for {ticker}: {e}")
+        return False
+
+
 def clear_cache() -> bool:
     """Clear all cached data by removing the cache file"""
     try:
+        with _MEMORY_LOCK:
+            _MEMORY_CACHE.clear()
         if os.path.exists(CACHE_FILE):
             os.remove(CACHE_FILE)
         return True
@@ -175,6 +250,28 @@ def clear_cache() -> bool:
         return False
 
 
+def invalidate_tickers(tickers: List[str]) -> int:
+    """
+    Drop cached entries for the given tickers only (targeted refresh).
+    Returns the number of entries removed.
+    """
+    try:
+        with _MEMORY_LOCK:
+            for ticker in tickers:
+                _MEMORY_CACHE.pop(ticker, None)
+        all_cache = _load_cache_file()
+        removed = 0
+        for ticker in tickers:
+            if all_cache['stocks'].pop(ticker, None) is not None:
+                removed += 1
+        if removed:
+            _save_cache_file(all_cache)
+        return removed
+    except Exception as e:
+        print(f"Error invalidating cache: {e}")
+        return 0
+
+
 def get_cache_stats() -> Dict[str, int]:
     """
     Get cache statistics using smart TTL.
@@ -206,6 +303,12 @@ def get_cache_stats() -> Dict[str, int]:
 
 # Private helper functions
 
+def _remember(stocks: dict) -> None:
+    """Mirror file cache entries into the in-process memory cache."""
+    with _MEMORY_LOCK:
+        _MEMORY_CACHE.update(stocks)
+
+
 def _load_cache_file() -> dict:
     """Load the entire cache file with shared lock. Returns empty structure if not found."""
     default_cache = {
@@ -8,6 +8,10 @@ SAVED_LISTS_DIR = "saved_stock_lists"
 # Pagination settings
 ITEMS_PER_PAGE = 10
 
+# Results table renderer: True = native st.dataframe (Arrow payload, virtualized grid,
+# Styler gain/loss colors; default), False = styled HTML table with SVG sparklines
+USE_NATIVE_TABLE = True
+
 # Fallback stock lists (Latest Nifty 50 composition - Updated November 14, 2025)
 FALLBACK_NIFTY_50 = [
     'ADANIENT.NS', 'ADANIPORTS.NS', 'APOLLOHOSP.NS', 'ASIANPAINT.NS', 'AXISBANK.NS',
@@ -252,9 +252,9 @@ doc.add_paragraph('Manages custom stock lists.')
 doc.add_heading('Key Functions:', 3)
 file_funcs = [
     ('ensure_saved_lists_dir()', 'Create directory'),
-    ('save_list_to_csv()', 'Save list'),
-    ('load_list_from_csv()', 'Load list'),
-    ('delete_list_csv()', 'Delete list'),
+    ('save_list_to_json()', 'Save list'),
+    ('load_list_from_json()', 'Load list'),
+    ('delete_list_json()', 'Delete list'),
     ('load_all_saved_lists()', 'Load all on startup')
 ]
 for func, desc in file_funcs:
@@ -4,21 +4,30 @@ Handles all API calls to NSE, Yahoo Finance, and other data sources
 """
 import streamlit as st
 import pandas as pd
+import numpy as np
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
 import os
 from io import StringIO
 import time
+import threading
 from datetime import datetime, timedelta
 import yfinance as yf
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from functools import wraps
+from functools import lru_cache, wraps
 
 from config import COMMODITIES, FALLBACK_NIFTY_50, FALLBACK_NIFTY_NEXT_50, FALLBACK_BSE_SENSEX
-from cache_manager import load_from_cache, save_to_cache, load_bulk_cache, save_bulk_cache
+from cache_manager import load_from_cache, save_to_cache, load_bulk_cache, save_bulk_cache, load_history, save_history
+from smart_cache_utils import ttl_bucket, tracked_cache_data
 
 DEFAULT_EXCHANGE_SUFFIX = '.NS'
 
+# yf.download collects results in module-level dicts, so concurrent calls from
+# different threads can clobber each other; every batch download holds this lock
+YF_DOWNLOAD_LOCK = threading.Lock()
+
 
 def retry_with_backoff(max_retries=3, initial_delay=1.0, backoff_factor=2.0):
     """Decorator to retry function calls with exponential backoff on failure"""
@@ -65,10 +74,76 @@ def fast_get(source, key, default=None):
     return getattr(source, key, default)
 
 
-@st.cache_data(ttl=120, show_spinner=False)
+class ThrottledUpdater:
+    """Rate-limit progress writes to a Streamlit element.
+
+    Every element update is a websocket round-trip, so per-ticker updates on
+    large lists are throttled to at most one per ``min_interval`` seconds.
+    """
+
+    def __init__(self, update_fn, min_interval=0.1):
+        self.update_fn = update_fn
+        self.min_interval = min_interval
+        self.last = 0.0
+
+    def update(self, *args, force=False):
+        """Forward to update_fn unless the last write was too recent (force=True always writes)."""
+        now = time.monotonic()
+        if force or now - self.last >= self.min_interval:
+            self.update_fn(*args)
+            self.last = now
+
+
+@st.cache_resource
+def get_nse_session():
+    """Process-wide keep-alive session for NSE endpoints (pooled TLS connections, shared cookies).
+
+    Shared across threads and sessions: never mutate it per call, pass
+    request-specific headers to session.get() instead.
+    """
+    session = requests.Session()
+    retry = Retry(total=3, backoff_factor=0.3, status_forcelist=(500, 502, 503, 504), allowed_methods=frozenset(['GET']))
+    session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retry))
+    return session
+
+
+# Bot-check cookies NSE sets on its homepage; the API rejects requests without them
+NSE_COOKIE_NAMES = ('nsit', 'nseappid', 'bm_sv')
+
+
+def nse_get(url, headers, timeout=10):
+    """GET an NSE endpoint on the shared session, visiting the homepage for cookies only when needed.
+
+    The homepage warm-up (and its pause) runs once per process instead of on
+    every call; a 401/403 means the cookies went stale, so warm up and retry once.
+    """
+    session = get_nse_session()
+    if not any(name in session.cookies for name in NSE_COOKIE_NAMES):
+        session.get("https://www.nseindia.com", headers=headers, timeout=timeout)
+        time.sleep(0.3)
+    response = session.get(url, headers=headers, timeout=timeout)
+    if response.status_code in (401, 403):
+        session.cookies.clear()
+        session.get("https://www.nseindia.com", headers=headers, timeout=timeout)
+        time.sleep(0.3)
+        response = session.get(url, headers=headers, timeout=timeout)
+    return response
+
+
+@lru_cache(maxsize=512)
+def get_ticker(symbol):
+    """Process-wide yf.Ticker per symbol, reused across reruns for history() calls.
+
+    Only for history(): a Ticker memoizes fast_info/info on first access, so
+    live quote lookups must keep building a fresh yf.Ticker.
+    """
+    return yf.Ticker(symbol)
+
+
+@tracked_cache_data(ttl=120, show_spinner=False, max_entries=1024)
 def get_cached_history(symbol: str, period: str = '6mo', interval: str = '1d'):
     """Fetch and cache yahoo finance history with sensible defaults."""
-    ticker = yf.Ticker(symbol)
+    ticker = get_ticker(symbol)
     return ticker.history(period=period, interval=interval, auto_adjust=True, actions=False, prepost=False)
 
 
@@ -87,7 +162,7 @@ def get_available_nse_indices():
     return indices
 
 
-@st.cache_data(ttl=86400)  # Cache for 24 hours (refreshes daily)
+@st.cache_data(ttl=86400, show_spinner=False, max_entries=64)  # Cache for 24 hours (refreshes daily)
 def fetch_nse_index_constituents(index_name):
     """Fetch index constituents from NSE CSV (auto-updated when composition changes)"""
     try:
@@ -112,23 +187,18 @@ def fetch_nse_index_constituents(index_name):
             'Referer': 'https://www.nseindia.com/'
         }
        
-        with requests.Session() as session:
-            session.headers.update(headers)
-            session.get("https://www.nseindia.com", timeout=10)
-            time.sleep(1)
+        response = nse_get(url, headers)
            
-            response = session.get(url, timeout=10)
+        if response.status_code == 200:
+            csv_content = response.content.decode('utf-8')
+            df = pd.read_csv(StringIO(csv_content))
            
-            if response.status_code == 200:
-                csv_content = response.content.decode('utf-8')
-                df = pd.read_csv(StringIO(csv_content))
+            if 'Symbol' in df.columns:
+                symbols = df['Symbol'].dropna().tolist()
+                stocks = [f"{symbol}.NS" for symbol in symbols if pd.notna(symbol)]
                
-                if 'Symbol' in df.columns:
-                    symbols = df['Symbol'].dropna().tolist()
-                    stocks = [f"{symbol}.NS" for symbol in symbols if pd.notna(symbol)]
-                   
-                    if len(stocks) >= 5:
-                        return stocks
+                if len(stocks) >= 5:
+                    return stocks
        
         return None
     except Exception as e:
@@ -136,7 +206,7 @@ def fetch_nse_index_constituents(index_name):
         return None
 
 
-@st.cache_data(ttl=86400)  # Cache for 24 hours
+@st.cache_data(ttl=86400, show_spinner=False, max_entries=64)  # Cache for 24 hours
 def fetch_nse_csv_list(csv_filename):
     """Fetch stock list from NSE CSV endpoint (fallback method)"""
     try:
@@ -147,26 +217,26 @@ def fetch_nse_csv_list(csv_filename):
             'Referer': 'https://www.nseindia.com/market-data/live-equity-market'
         }
        
-        with requests.Session() as session:
-            session.headers.update(headers)
-            session.get("https://www.nseindia.com", timeout=10)
-            time.sleep(1)
+        response = nse_get(url, headers)
            
-            response = session.get(url, timeout=10)
-           
-            if response.status_code == 200:
-                csv_content = response.content.decode('utf-8')
-                df = pd.read_csv(StringIO(csv_content))
-                stocks = [f"{symbol}.NS" for symbol in df['Symbol'].tolist() if pd.notna(symbol)]
-                if len(stocks) >= 5:
-                    return stocks
+        if response.status_code == 200:
+            csv_content = response.content.decode('utf-8')
+            df = pd.read_csv(StringIO(csv_content))
+            stocks = [f"{symbol}.NS" for symbol in df['Symbol'].tolist() if pd.notna(symbol)]
+            if len(stocks) >= 5:
+                return stocks
         return None
     except Exception as e:
         return None
 
 
-@st.cache_data(ttl=120, show_spinner=False)  # Cache for 2 minutes for intraday updates
 def get_index_performance(index_symbol, index_name=None):
+    """Fetch index performance (2 min cache while market is open, longer when closed)"""
+    return _get_index_performance(index_symbol, index_name, ttl_bucket('intraday'))
+
+
+@tracked_cache_data(ttl=86400, show_spinner=False, max_entries=256)  # Expiry driven by ttl_bucket
+def _get_index_performance(index_symbol, index_name, bucket):
     """Fetch index performance using fast_info for speed"""
     if index_symbol:
         try:
@@ -181,9 +251,10 @@ def get_index_performance(index_symbol, index_name=None):
                 return float(current_price), change_pct
            
             hist = get_cached_history(index_symbol, period='5d', interval='1d')
-            if not hist.empty and len(hist) >= 2:
-                current_price = hist['Close'].iloc[-1]
-                previous_price = hist['Close'].iloc[-2]
+            if hist.shape[0] >= 2:
+                closes = hist['Close'].to_numpy()
+                current_price = closes[-1]
+                previous_price = closes[-2]
                 change_pct = ((current_price - previous_price) / previous_price) * 100
                 return float(current_price), change_pct
                
@@ -193,19 +264,182 @@ def get_index_performance(index_symbol, index_name=None):
     return None, None
 
 
+def get_all_index_performance(symbols):
+    """Fetch {symbol: (price, change_pct)} for many indices with one batched download.
+
+    Symbols missing from the batch fall back to get_index_performance(),
+    fetched concurrently (fast_info + Ticker.history, no yf.download lock).
+    """
+    symbols = tuple(symbols)
+    try:
+        performance = _get_all_index_performance(symbols, ttl_bucket('intraday'))
+    except Exception as e:
+        print(f"Batch index download failed: {e}")
+        performance = {}
+    missing = [symbol for symbol in symbols if not performance.get(symbol)]
+    if missing:
+        with ThreadPoolExecutor(max_workers=len(missing), thread_name_prefix="index") as executor:
+            fallback = dict(zip(missing, executor.map(get_index_performance, missing)))
+        return {symbol: performance.get(symbol) or fallback[symbol] for symbol in symbols}
+    return {symbol: performance[symbol] for symbol in symbols}
+
+
+@tracked_cache_data(ttl=86400, show_spinner=False, max_entries=16)  # Expiry driven by ttl_bucket
+def _get_all_index_performance(symbols, bucket):
+    """One yf.download for all index symbols; last close vs previous close per column"""
+    with YF_DOWNLOAD_LOCK:
+        data = yf.download(
+            tickers=list(symbols),
+            period='5d',
+            interval='1d',
+            group_by='ticker',
+            progress=False,
+            auto_adjust=True,
+            actions=False,
+            threads=True
+        )
+    if data is None or data.empty:
+        raise ValueError("empty index download")
+
+    if isinstance(data.columns, pd.MultiIndex):
+        close_wide = data.xs('Close', axis=1, level=1)
+    else:
+        close_wide = data[['Close']].set_axis(list(symbols[:1]), axis=1)
+
+    closes, counts = _bottom_align_closes(close_wide)
+    if len(closes) < 2:
+        return {}
+    current, previous = closes[-1], closes[-2]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        change_pct = (current - previous) / previous * 100
+    usable = (counts >= 2) & (previous != 0)
+    return {
+        symbol: (float(current[j]), float(change_pct[j]))
+        for j, symbol in enumerate(close_wide.columns)
+        if usable[j]
+    }
+
+
+HISTORY_PERIOD = '6mo'
+RECENT_PERIOD = '1mo'  # Spans the tail a stored history (at most a week old) is missing
+
+
+def _naive_dates(closes):
+    """Drop the timezone from a daily index so Ticker.history and yf.download rows line up."""
+    if getattr(closes.index, 'tz', None) is not None:
+        return closes.set_axis(closes.index.tz_localize(None), axis=0)
+    return closes
+
+
+def _splice_history(stored, recent):
+    """Extend a stored Close series with a freshly downloaded tail.
+
+    Returns None when the overlapping closes disagree (a split or dividend
+    re-adjusted the past), so the caller re-downloads the full history.
+    """
+    recent = _naive_dates(recent.dropna())
+    if recent.empty:
+        return None
+    # The stored last row may be a mid-session close, so it is not compared
+    overlap = stored.index.intersection(recent.index)
+    overlap = overlap[overlap < stored.index[-1]]
+    if overlap.empty or not np.allclose(stored[overlap].to_numpy(), recent[overlap].to_numpy(), rtol=1e-3):
+        return None
+    merged = pd.concat([stored[stored.index < recent.index[0]], recent])
+    return merged[merged.index > merged.index[-1] - pd.DateOffset(months=6)]
+
+
 @retry_with_backoff(max_retries=3, initial_delay=0.5, backoff_factor=2.0)
 def _fetch_stock_data_with_retry(normalized_ticker):
-    """Internal function to fetch stock data with retry logic"""
-    ticker_obj = yf.Ticker(normalized_ticker)
-    fast_info = getattr(ticker_obj, 'fast_info', None)
-    hist = get_cached_history(normalized_ticker, period='6mo', interval='1d')
-    return fast_info, hist
+    """Internal function to fetch stock data with retry logic (one history request per ticker)"""
+    stored = load_history(normalized_ticker)
+    if stored is not None:
+        recent = get_cached_history(normalized_ticker, period=RECENT_PERIOD, interval='1d')
+        if not recent.empty:
+            closes = _splice_history(stored, recent['Close'])
+            if closes is not None:
+                return closes.rename('Close').to_frame()
+
+    hist = get_cached_history(normalized_ticker, period=HISTORY_PERIOD, interval='1d')
+    if not hist.empty:
+        save_history(normalized_ticker, _naive_dates(hist['Close'].dropna()))
+    return hist
+
+
+def _bottom_align_closes(close_wide):
+    """Return (closes, counts): each column's valid closes moved to end on the last row.
+
+    Gaps come from aligning several symbols on shared dates (different listing
+    dates or exchange holidays); a stable sort pushes them to the top so row
+    offsets from the bottom are per-symbol trading days.
+    """
+    closes = close_wide.to_numpy(dtype=float)
+    valid = ~np.isnan(closes)
+    closes = np.take_along_axis(closes, np.argsort(valid, axis=0, kind='stable'), axis=0)
+    return closes, valid.sum(axis=0)
+
+
+# Lookbacks in trading days: Today = 1 (previous close), 1 Week = ~5,
+# 1 Month = ~21 (4.2 weeks), 2 Months = ~42, 3 Months = ~63 (quarter)
+LOOKBACK_TRADING_DAYS = np.array([1, 5, 21, 42, 63])
+LOOKBACK_COLUMNS = ['Today %', '1 Week %', '1 Month %', '2 Months %', '3 Months %']
+SPARKLINE_BARS = 60
+
+
+def _performance_rows(close_wide):
+    """Build performance rows for every column (ticker) of a date-indexed Close frame at once."""
+    close_wide = close_wide.loc[:, close_wide.notna().any()]
+    if close_wide.empty:
+        return []
+
+    closes, counts = _bottom_align_closes(close_wide)
+    last = len(closes) - 1
+    first = last + 1 - counts
+    cols = np.arange(closes.shape[1])
+
+    # Get current price - latest daily bar (today's live bar during market hours)
+    current = closes[last]
+
+    # CRITICAL FIX: Use TRADING DAYS instead of calendar months for accurate lookback
+    # Every lookback for every ticker is one indexed read; short histories clamp
+    # to the earliest available price
+    base = closes[np.maximum(last - LOOKBACK_TRADING_DAYS[:, None], first), cols]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        changes = np.where(base != 0, (current - base) / base * 100, 0.0)
+
+        window = closes[max(len(closes) - SPARKLINE_BARS, 0):]
+        low = np.nanmin(window, axis=0)
+        price_range = np.nanmax(window, axis=0) - low
+        sparklines = np.where(price_range > 0, (window - low) / price_range * 100, 50.0)
+    spark_lengths = np.minimum(counts, SPARKLINE_BARS)
+
+    # Round the whole (tickers x lookbacks) block in one call and unbox it to
+    # Python floats in one tolist(), instead of a round() per cell
+    changes = np.round(changes, 2).T.tolist()
+    prices = current.tolist()
+
+    results = []
+    for j, ticker in enumerate(close_wide.columns):
+        row = {
+            'Ticker': ticker,
+            'Stock Name': ticker.replace('.NS', '').replace('.BO', ''),
+            'Current Price': round(prices[j], 2),  # Numeric; formatted as ₹ at display time
+        }
+        row.update(zip(LOOKBACK_COLUMNS, changes[j]))
+        row['sparkline_data'] = sparklines[len(window) - spark_lengths[j]:, j].tolist()
+        results.append(row)
+    return results
+
+
+def _performance_from_history(normalized_ticker, hist):
+    """Build a performance row from one ticker's daily Close history."""
+    rows = _performance_rows(hist[['Close']].set_axis([normalized_ticker], axis=1))
+    return rows[0] if rows else None
 
 
 def get_stock_performance(ticker, use_cache=True):
     """Fetch stock performance with low-latency Yahoo Finance access and retry on failure."""
     normalized_ticker = normalize_symbol(ticker)
-    display_symbol = normalized_ticker.replace('.NS', '').replace('.BO', '')
 
     cache_key = normalized_ticker if ticker != normalized_ticker else ticker
 
@@ -215,7 +449,7 @@ def get_stock_performance(ticker, use_cache=True):
             return cached_data
 
     try:
-        fast_info, hist = _fetch_stock_data_with_retry(normalized_ticker)
+        hist = _fetch_stock_data_with_retry(normalized_ticker)
     except Exception as e:
         # All retries failed, return None
         if hasattr(st, 'logger'):
@@ -225,75 +459,9 @@ def get_stock_performance(ticker, use_cache=True):
     if hist is None or hist.empty:
         return None
 
-    try:
-        if hasattr(hist.index, 'tz') and hist.index.tz is not None:
-            hist.index = hist.index.tz_localize(None)
-    except Exception:
-        pass
-
-    # Get current price - use fast_info or fallback to latest hist close
-    current_price = fast_get(fast_info, 'last_price')
-    hist_close_latest = float(hist['Close'].iloc[-1])
-    if current_price is None:
-        current_price = hist_close_latest
-    current_price = float(current_price)
-
-    # CRITICAL FIX: Use hist data for previous_close (more reliable than fast_info)
-    # fast_info.previous_close is unreliable during market hours
-    previous_close = float(hist['Close'].iloc[-2]) if len(hist) >= 2 else current_price
-    change_today = ((current_price - previous_close) / previous_close) * 100 if previous_close else 0.0
-
-    # CRITICAL FIX: Use TRADING DAYS instead of calendar months for accurate lookback
-    # Professional platforms use trading days, not calendar dates
-    def get_price_n_days_ago(close_series, trading_days):
-        """Get price N trading days ago (not calendar days)"""
-        if len(close_series) < trading_days + 1:
-            # Not enough data, return earliest available price
-            return float(close_series.iloc[0])
-        # Go back N trading days from latest close
-        idx = max(-len(close_series), -1 - trading_days)
-        return float(close_series.iloc[idx])
-    
-    # Use industry-standard trading day periods:
-    # 1 Week = ~5 trading days
-    # 1 Month = ~21 trading days (4.2 weeks)
-    # 2 Months = ~42 trading days
-    # 3 Months = ~63 trading days (quarter)
-    price_1w = get_price_n_days_ago(hist['Close'], 5)
-    change_1w = ((current_price - price_1w) / price_1w) * 100 if price_1w else 0.0
-
-    price_1m = get_price_n_days_ago(hist['Close'], 21)
-    change_1m = ((current_price - price_1m) / price_1m) * 100 if price_1m else 0.0
-
-    price_2m = get_price_n_days_ago(hist['Close'], 42)
-    change_2m = ((current_price - price_2m) / price_2m) * 100 if price_2m else 0.0
-
-    price_3m = get_price_n_days_ago(hist['Close'], 63)
-    change_3m = ((current_price - price_3m) / price_3m) * 100 if price_3m else 0.0
-
-    spark_period = min(len(hist), 60)
-    sparkline_prices = hist['Close'].iloc[-spark_period:].tolist() if spark_period else []
-    sparkline_data = []
-    if sparkline_prices:
-        min_price = min(sparkline_prices)
-        max_price = max(sparkline_prices)
-        price_range = max_price - min_price
-        if price_range > 0:
-            sparkline_data = [((p - min_price) / price_range) * 100 for p in sparkline_prices]
-        else:
-            sparkline_data = [50] * len(sparkline_prices)
-
-    result = {
-        'Ticker': normalized_ticker,
-        'Stock Name': display_symbol,
-        'Current Price': f"₹{current_price:.2f}",
-        'Today %': round(change_today, 2),
-        '1 Week %': round(change_1w, 2),
-        '1 Month %': round(change_1m, 2),
-        '2 Months %': round(change_2m, 2),
-        '3 Months %': round(change_3m, 2),
-        'sparkline_data': sparkline_data,
-    }
+    result = _performance_from_history(normalized_ticker, hist)
+    if result is None:
+        return None
 
     if use_cache:
         save_to_cache(cache_key, result)
@@ -301,6 +469,101 @@ def get_stock_performance(ticker, use_cache=True):
     return result
 
 
+BATCH_DOWNLOAD_SIZE = 20  # Yahoo serves ~20 symbols per multi-symbol request
+
+
+def _download_close_wide(tickers, period):
+    """Wide Close frame (one column per ticker) from one yf.download call."""
+    with YF_DOWNLOAD_LOCK:
+        data = yf.download(
+            tickers=list(tickers),
+            period=period,
+            interval='1d',
+            group_by='ticker',
+            progress=False,
+            auto_adjust=True,
+            actions=False,
+            threads=True
+        )
+    if data is None or data.empty:
+        raise ValueError("empty batch download")
+
+    if isinstance(data.columns, pd.MultiIndex):
+        close_wide = data.xs('Close', axis=1, level=1)
+        return _naive_dates(close_wide.loc[:, close_wide.columns.isin(tickers)])
+    return _naive_dates(data[['Close']].set_axis(list(tickers[:1]), axis=1))
+
+
+@tracked_cache_data(ttl=86400, show_spinner=False, max_entries=32)  # Expiry driven by ttl_bucket
+def get_cached_batch_history(tickers, bucket):
+    """Wide Close frame (one column per ticker) for a batch, cached in memory.
+
+    tickers must be a sorted tuple so the same batch always hashes the same.
+    Expiry comes from the hashed ``bucket`` argument (ttl_bucket) rolling over every
+    ttl_for('intraday'); old buckets age out via ttl/max_entries. Intraday
+    quotes are stale after a restart anyway, so nothing is persisted here
+    (past closes survive restarts in the per-ticker history store).
+
+    Tickers with a stored per-ticker history only download the last
+    RECENT_PERIOD and splice it on; the rest download HISTORY_PERIOD and
+    seed the store.
+    """
+    stored = {t: load_history(t) for t in tickers}
+    columns = {}
+    errors = []
+
+    with_history = tuple(t for t in tickers if stored[t] is not None)
+    if with_history:
+        try:
+            recent = _download_close_wide(with_history, RECENT_PERIOD)
+            for t in recent.columns:
+                closes = _splice_history(stored[t], recent[t])
+                if closes is not None:
+                    columns[t] = closes
+        except Exception as e:
+            errors.append(e)
+
+    full = tuple(t for t in tickers if t not in columns)
+    if full:
+        try:
+            close_wide = _download_close_wide(full, HISTORY_PERIOD)
+            for t in close_wide.columns:
+                closes = close_wide[t].dropna()
+                if not closes.empty:
+                    columns[t] = closes
+                    save_history(t, closes)
+        except Exception as e:
+            errors.append(e)
+
+    if not columns:
+        # Raise rather than persist an empty frame for the rest of the bucket
+        raise errors[0] if errors else ValueError("empty batch download")
+    return pd.DataFrame(columns)
+
+
+def fetch_batch(tickers, use_cache=True):
+    """Fetch performance rows for up to BATCH_DOWNLOAD_SIZE tickers with one yf.download call.
+
+    Downloads are serialized through YF_DOWNLOAD_LOCK, so running batches from
+    worker threads gains nothing; call it from the script thread.
+    """
+    normalized = sorted(set(normalize_symbol(t) for t in tickers))
+    if not normalized:
+        return []
+
+    try:
+        close_wide = get_cached_batch_history(tuple(normalized), ttl_bucket('intraday'))
+        results = _performance_rows(close_wide)
+    except Exception as e:
+        print(f"Batch fetch failed for {normalized[0]}..: {e}")
+        return []
+
+    if use_cache and results:
+        save_bulk_cache(results)
+
+    return results
+
+
 @retry_with_backoff(max_retries=2, initial_delay=0.5, backoff_factor=2.0)
 def _fetch_52week_data_with_retry(normalized):
     """Internal function to fetch 52-week data with retry logic"""
@@ -310,8 +573,13 @@ def _fetch_52week_data_with_retry(normalized):
     return fast_info, hist
 
 
-@st.cache_data(ttl=3600, show_spinner=False)
 def get_stock_52_week_range(ticker):
+    """Return current price and 52-week high/low details (1 hour cache while market is open, daily otherwise)"""
+    return _get_stock_52_week_range(ticker, ttl_bucket('52w'))
+
+
+@tracked_cache_data(ttl=86400, show_spinner=False, max_entries=1024)  # Expiry driven by ttl_bucket
+def _get_stock_52_week_range(ticker, bucket):
     """Return current price and 52-week high/low details using fast_info and cached history with retry logic"""
     try:
         normalized = normalize_symbol(ticker)
@@ -336,17 +604,17 @@ def get_stock_52_week_range(ticker):
         if hist is None or hist.empty:
             return None
         
-        try:
-            if hasattr(hist.index, 'tz') and hist.index.tz is not None:
-                hist.index = hist.index.tz_localize(None)
-        except Exception:
-            pass
-        
-        current_price = current_price or float(hist['Close'].iloc[-1])
-        week_52_high = float(hist['High'].max())
-        week_52_low = float(hist['Low'].min())
-        high_date = hist['High'].idxmax()
-        low_date = hist['Low'].idxmin()
+        # Dates are only formatted as local calendar days, so the exchange-tz
+        # index is used as-is (no tz_localize copy of the whole index)
+        highs = hist['High'].to_numpy()
+        lows = hist['Low'].to_numpy()
+        high_pos = np.nanargmax(highs)
+        low_pos = np.nanargmin(lows)
+        current_price = current_price or float(hist['Close'].to_numpy()[-1])
+        week_52_high = float(highs[high_pos])
+        week_52_low = float(lows[low_pos])
+        high_date = hist.index[high_pos]
+        low_date = hist.index[low_pos]
         
         def _format_date(date_value):
             if isinstance(date_value, pd.Timestamp):
@@ -365,19 +633,24 @@ def get_stock_52_week_range(ticker):
         return None
 
 
-def _fetch_commodities_individual(tickers_list):
-    """FALLBACK: Fetch commodities one by one if bulk download fails"""
+def _fetch_commodities(tickers_list):
+    """Fetch commodities with one bulk download, then individually for any it missed"""
     import math
-    print("🔄 Fetching commodities individually (fallback mode)...")
+    print("🔄 Fetching commodities (bulk download, individual fallback)...")
     prices = {}
     
     def fetch_single(ticker, name_key):
         """Fetch single commodity with error handling"""
         try:
             print(f"🔍 Fetching {name_key} ({ticker})...")
-            ticker_obj = yf.Ticker(ticker)
-            hist = ticker_obj.history(period='1mo')
-            
+            return quote_from_history(get_ticker(ticker).history(period='1mo'), name_key)
+        except Exception as e:
+            print(f"❌ Error fetching {name_key}: {e}")
+            return None
+
+    def quote_from_history(hist, name_key):
+        """Price, 1-day and 1-week change from a daily Close history (None if unusable)"""
+        try:
             if hist is None:
                 print(f"❌ {name_key}: hist is None")
                 return None
@@ -390,8 +663,9 @@ def _fetch_commodities_individual(tickers_list):
                 print(f"⚠️ {name_key}: Only {len(hist)} data point(s)")
                 return None
             
-            current = float(hist['Close'].iloc[-1])
-            previous = float(hist['Close'].iloc[-2])
+            closes = hist['Close'].to_numpy()
+            current = float(closes[-1])
+            previous = float(closes[-2])
             
             if math.isnan(current) or math.isnan(previous):
                 print(f"⚠️ NaN values for {name_key}")
@@ -402,8 +676,8 @@ def _fetch_commodities_individual(tickers_list):
                 change_pct = 0
             
             week_change = 0
-            if len(hist) >= 7:
-                week_ago = float(hist['Close'].iloc[-6])
+            if closes.shape[0] >= 7:
+                week_ago = float(closes[-6])
                 if not math.isnan(week_ago) and week_ago != 0:
                     week_change = ((current - week_ago) / week_ago) * 100
                     if math.isnan(week_change):
@@ -418,11 +692,49 @@ def _fetch_commodities_individual(tickers_list):
                 'color': '#00FFA3' if change_pct >= 0 else '#FF6B6B'
             }
         except Exception as e:
-            print(f"❌ Error fetching {name_key}: {e}")
+            print(f"❌ Error reading {name_key}: {e}")
             return None
     
-    # Fetch USD/INR first (needed for gold/silver)
-    inr_result = fetch_single('INR=X', 'USD/INR')
+    # USD/INR is applied first below (gold/silver need it)
+    jobs = {
+        'USD/INR': 'INR=X',
+        'Oil': COMMODITIES['oil'],
+        'Gold': COMMODITIES['gold'],
+        'Silver': COMMODITIES['silver'],
+        'Bitcoin': COMMODITIES['btc'],
+        'Ethereum': COMMODITIES['ethereum'],
+    }
+    results = {}
+    try:
+        # One multi-symbol request for the whole basket. Crypto trades 24x7 and
+        # futures/FX don't, so the aligned frame has per-column gaps: drop each
+        # column's NaN rows before reading it (raw iloc[-1] on it gave NaNs)
+        with YF_DOWNLOAD_LOCK:
+            data = yf.download(
+                tickers=list(jobs.values()),
+                period='1mo',
+                interval='1d',
+                group_by='ticker',
+                progress=False,
+                auto_adjust=True,
+                actions=False,
+                threads=True
+            )
+        if data is not None and not data.empty and isinstance(data.columns, pd.MultiIndex):
+            returned = set(data.columns.get_level_values(0))
+            for name, ticker in jobs.items():
+                if ticker in returned:
+                    results[name] = quote_from_history(data[ticker].dropna(subset=['Close']), name)
+    except Exception as e:
+        print(f"⚠️ Bulk commodity download failed: {e}")
+
+    missing = {name: ticker for name, ticker in jobs.items() if not results.get(name)}
+    if missing:
+        with ThreadPoolExecutor(max_workers=len(missing), thread_name_prefix="commodities") as executor:
+            futures = {name: executor.submit(fetch_single, ticker, name) for name, ticker in missing.items()}
+        results.update({name: future.result() for name, future in futures.items()})
+
+    inr_result = results['USD/INR']
     if inr_result and inr_result['current'] > 0:
         # Individual fetch returns correct value directly (e.g., 89.59)
         usd_inr_rate = inr_result['current']
@@ -436,7 +748,7 @@ def _fetch_commodities_individual(tickers_list):
     prices['usd_inr_week_change'] = inr_result['week_change'] if inr_result else 0
     
     # Oil
-    oil_result = fetch_single(COMMODITIES['oil'], 'Oil')
+    oil_result = results['Oil']
     if oil_result:
         prices['oil'] = f"${oil_result['current']:.2f}"
         prices['oil_change'] = oil_result['change']
@@ -451,7 +763,7 @@ def _fetch_commodities_individual(tickers_list):
         prices['oil_week_change'] = 0
     
     # Gold
-    gold_result = fetch_single(COMMODITIES['gold'], 'Gold')
+    gold_result = results['Gold']
     if gold_result:
         gold_per_gram_usd = gold_result['current'] / 31.1035
         gold_per_10g_inr = gold_per_gram_usd * 10 * usd_inr_rate
@@ -470,7 +782,7 @@ def _fetch_commodities_individual(tickers_list):
         prices['gold_week_change'] = 0
     
     # Silver
-    silver_result = fetch_single(COMMODITIES['silver'], 'Silver')
+    silver_result = results['Silver']
     if silver_result:
         silver_per_gram_usd = silver_result['current'] / 31.1035
         silver_per_kg_inr = silver_per_gram_usd * 1000 * usd_inr_rate
@@ -489,7 +801,7 @@ def _fetch_commodities_individual(tickers_list):
         prices['silver_week_change'] = 0
     
     # Bitcoin
-    btc_result = fetch_single(COMMODITIES['btc'], 'Bitcoin')
+    btc_result = results['Bitcoin']
     if btc_result:
         prices['btc'] = f"${btc_result['current']:,.0f}"
         prices['btc_change'] = btc_result['change']
@@ -504,7 +816,7 @@ def _fetch_commodities_individual(tickers_list):
         prices['btc_week_change'] = 0
     
     # Ethereum
-    eth_result = fetch_single(COMMODITIES['ethereum'], 'Ethereum')
+    eth_result = results['Ethereum']
     if eth_result:
         prices['ethereum'] = f"${eth_result['current']:,.2f}"
         prices['ethereum_change'] = eth_result['change']
@@ -541,9 +853,8 @@ def get_commodities_prices():
     ]
     
     try:
-        # CRITICAL FIX: Bulk download returns NaN for commodities - skip directly to individual
-        print("⚠️ Bulk download returns NaN for commodities - using individual fetches")
-        return _fetch_commodities_individual(tickers_list)
+        # Bulk download with per-column NaN handling + individual fallback
+        return _fetch_commodities(tickers_list)
         
         # OLD CODE - Bulk download disabled due to NaN issues
         # print("📊 Fetching commodity prices (bulk download)...")
@@ -554,7 +865,7 @@ def get_commodities_prices():
         # if data is None or data.empty:
         #     print("⚠️ WARNING: Bulk download failed, trying individual fetches...")
         #     # FALLBACK: Fetch individually
-        #     return _fetch_commodities_individual(tickers_list)
+        #     return _fetch_commodities(tickers_list)
         
         # Helper function to extract commodity data
         def extract_commodity_data(ticker_symbol, name_key):
@@ -588,8 +899,9 @@ def get_commodities_prices():
                 
                 # CRITICAL FIX: Handle NaN values from yfinance
                 import math
-                current = float(ticker_data['Close'].iloc[-1])
-                previous = float(ticker_data['Close'].iloc[-2])
+                closes = ticker_data['Close'].to_numpy()
+                current = float(closes[-1])
+                previous = float(closes[-2])
                 
                 # Check for NaN values
                 if math.isnan(current) or math.isnan(previous):
@@ -607,8 +919,8 @@ def get_commodities_prices():
                 color = '#00FFA3' if change_pct >= 0 else '#FF6B6B'
                 
                 week_change = 0
-                if len(ticker_data) >= 7:
-                    week_ago = float(ticker_data['Close'].iloc[-6])
+                if closes.shape[0] >= 7:
+                    week_ago = float(closes[-6])
                     if not math.isnan(week_ago) and week_ago != 0:
                         week_change = ((current - week_ago) / week_ago) * 100
                         if math.isnan(week_change):
@@ -697,7 +1009,7 @@ def get_commodities_prices():
         # CRITICAL FIX: Try individual fallback instead of returning empty data
         print("🔄 Attempting fallback to individual fetches...")
         try:
-            return _fetch_commodities_individual(tickers_list)
+            return _fetch_commodities(tickers_list)
         except Exception as e2:
             print(f"❌ Fallback also failed: {e2}")
             # Return empty defaults only if both methods fail
@@ -730,6 +1042,7 @@ def fetch_stocks_bulk(tickers, max_workers=4, use_cache=True, status_placeholder
     if missing_tickers:
         fresh_data = []
         progress_bar = st.progress(0)
+        progress = ThrottledUpdater(progress_bar.progress)
        
         # CRITICAL FIX: Limit workers to 3 max to avoid Yahoo Finance rate limiting/bans
         # Yahoo aggressively blocks Indian IPs making >50 requests/minute
@@ -753,7 +1066,7 @@ def fetch_stocks_bulk(tickers, max_workers=4, use_cache=True, status_placeholder
                 except Exception as e:
                     ticker = future_to_ticker[future]
                     print(f"Error fetching {ticker}: {e}")
-                progress_bar.progress(completed / len(missing_tickers))
+                progress.update(completed / len(missing_tickers), force=completed == len(missing_tickers))
        
         progress_bar.empty()
        
@@ -765,7 +1078,7 @@ def fetch_stocks_bulk(tickers, max_workers=4, use_cache=True, status_placeholder
     return cached_data
 
 
-@st.cache_data(ttl=3600, show_spinner=False)
+@st.cache_data(ttl=3600, show_spinner=False, max_entries=64)
 def get_stock_list(category_name):
     available_indices = get_available_nse_indices()
    
@@ -825,6 +1138,30 @@ def validate_stock_symbol(symbol):
         return False
 
 
+def validate_stock_symbols(symbols, max_workers=3):
+    """Batch-validate symbols, returning (valid, invalid) in input order.
+
+    Nifty 500 constituents are accepted via one set lookup; only symbols outside
+    it are checked against Yahoo (capped workers to respect rate limits).
+    """
+    try:
+        known, _ = get_stock_list('Nifty 500')
+        known = set(known or [])
+    except Exception as e:
+        print(f"Nifty 500 list unavailable for validation: {e}")
+        known = set()
+
+    unknown = [s for s in symbols if normalize_symbol(s) not in known]
+    checked = {}
+    if unknown:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(unknown))) as executor:
+            checked = dict(zip(unknown, executor.map(validate_stock_symbol, unknown)))
+
+    valid = [s for s in symbols if checked.get(s, True)]
+    invalid = [s for s in symbols if not checked.get(s, True)]
+    return valid, invalid
+
+
 @st.cache_data(ttl=86400, show_spinner=False)
 def get_next_nse_holiday():
     fallback_holidays = [
@@ -841,27 +1178,22 @@ def get_next_nse_holiday():
             'Referer': 'https://www.nseindia.com/regulations/holiday-master'
         }
        
-        with requests.Session() as session:
-            session.headers.update(headers)
-            session.get("https://www.nseindia.com", timeout=10)
-            time.sleep(1)
+        response = nse_get(url, headers)
            
-            response = session.get(url, timeout=10)
+        if response.status_code == 200:
+            data = response.json()
+            today = datetime.now().date()
            
-            if response.status_code == 200:
-                data = response.json()
-                today = datetime.now().date()
-               
-                if 'CM' in data:
-                    for holiday in data['CM']:
-                        holiday_date_str = holiday.get('tradingDate', '')
-                        if holiday_date_str:
-                            try:
-                                holiday_date = datetime.strptime(holiday_date_str, "%d-%b-%Y").date()
-                                if holiday_date > today:
-                                    return holiday_date.strftime("%d-%b-%Y")
-                            except:
-                                continue
+            if 'CM' in data:
+                for holiday in data['CM']:
+                    holiday_date_str = holiday.get('tradingDate', '')
+                    if holiday_date_str:
+                        try:
+                            holiday_date = datetime.strptime(holiday_date_str, "%d-%b-%Y").date()
+                            if holiday_date > today:
+                                return holiday_date.strftime("%d-%b-%Y")
+                        except:
+                            continue
     except Exception as e:
         print(f"Error fetching NSE holidays from API: {e}")
    
@@ -917,15 +1249,9 @@ def get_fii_dii_data():
             "Referer": "https://www.nseindia.com",
         }
 
-        with requests.Session() as session:
-            session.headers.update(headers)
-            # First request to set cookies
-            session.get("https://www.nseindia.com", timeout=10)
-            time.sleep(2)
-
-            response = session.get(url, timeout=10)
-            response.raise_for_status()
-            live_data = response.json()
+        response = nse_get(url, headers)
+        response.raise_for_status()
+        live_data = response.json()
 
         # fiidiiTradeReact returns array of objects with category, buyValue, sellValue, netValue
         print(f"FII/DII API Response type: {type(live_data)}")
@@ -1008,7 +1334,7 @@ def get_fii_dii_data():
 
 
 
-@st.cache_data(ttl=900, show_spinner=False)  # 15-min cache - volume rankings change slowly, matches commodities cache
+@st.cache_data(ttl=900, show_spinner=False, max_entries=32)  # 15-min cache - volume rankings change slowly, matches commodities cache
 def get_highest_volume_stocks(stock_list, top_n=5):
     """Fetch highest volume stocks using bulk download for speed"""
     if not stock_list:
@@ -1025,16 +1351,17 @@ def get_highest_volume_stocks(stock_list, top_n=5):
         for i in range(0, len(unique_symbols), chunk_size):
             chunk = unique_symbols[i:i + chunk_size]
            
-            data = yf.download(
-                tickers=chunk,
-                period='2d',
-                interval='1d',
-                group_by='ticker',
-                progress=False,
-                auto_adjust=True,
-                actions=False,
-                threads=True
-            )
+            with YF_DOWNLOAD_LOCK:
+                data = yf.download(
+                    tickers=chunk,
+                    period='2d',
+                    interval='1d',
+                    group_by='ticker',
+                    progress=False,
+                    auto_adjust=True,
+                    actions=False,
+                    threads=True
+                )
            
             if data.empty:
                 continue
@@ -1053,12 +1380,13 @@ def get_highest_volume_stocks(stock_list, top_n=5):
                     if vol_series.empty or close_series.empty:
                         continue
                    
-                    volume = float(vol_series.iloc[-1])
+                    volume = float(vol_series.to_numpy()[-1])
                     if volume <= 0:
                         continue
                    
-                    current_price = float(close_series.iloc[-1])
-                    prev_price = float(close_series.iloc[-2]) if len(close_series) > 1 else current_price
+                    closes = close_series.to_numpy()
+                    current_price = float(closes[-1])
+                    prev_price = float(closes[-2]) if closes.shape[0] > 1 else current_price
                     change_pct = ((current_price - prev_price) / prev_price) * 100 if prev_price else 0.0
                    
                     all_results.append({
@@ -8,106 +8,136 @@ import requests
 import json
 import time
 from datetime import datetime
+from io import StringIO
+import lxml.html
+import pandas as pd
+
+
+NSE_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/129.0.0.0 Safari/537.36',
+    'Accept': 'application/json',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Referer': 'https://www.nseindia.com/reports/fii-dii',
+    'Accept-Encoding': 'gzip, deflate, br'
+}
+
+_NSE_SESSION = None
+
+
+def _get_nse_session():
+    """Module-wide NSE session, primed with homepage cookies once per process"""
+    global _NSE_SESSION
+    if _NSE_SESSION is None:
+        session = requests.Session()
+        session.headers.update(NSE_HEADERS)
+        session.get("https://www.nseindia.com", timeout=15)
+        time.sleep(0.3)
+        _NSE_SESSION = session
+    return _NSE_SESSION
+
+
+def _nse_get(url):
+    """GET an NSE API URL on the shared session; stale cookies (401/403) re-prime it once"""
+    global _NSE_SESSION
+    response = _get_nse_session().get(url, timeout=15)
+    if response.status_code in (401, 403):
+        _NSE_SESSION = None
+        response = _get_nse_session().get(url, timeout=15)
+    return response
 
 
 def fetch_fii_dii_from_nse():
     """Try to fetch from NSE API"""
     try:
         url = "https://www.nseindia.com/api/fiidiiTradeReact"
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/129.0.0.0 Safari/537.36',
-            'Accept': 'application/json',
-            'Accept-Language': 'en-US,en;q=0.9',
-            'Referer': 'https://www.nseindia.com/reports/fii-dii',
-            'Accept-Encoding': 'gzip, deflate, br'
-        }
-        
-        with requests.Session() as session:
-            session.headers.update(headers)
-            session.get("https://www.nseindia.com", timeout=10)
-            time.sleep(2)
+        response = _nse_get(url)
+
+        if response.status_code == 200:
+            data = response.json()
             
-            response = session.get(url, timeout=15)
+            fii_data = None
+            dii_data = None
+            report_date = None
             
-            if response.status_code == 200:
-                data = response.json()
-                
-                fii_data = None
-                dii_data = None
-                report_date = None
-                
-                if isinstance(data, list):
-                    for item in data:
-                        if isinstance(item, dict):
-                            category = item.get('category', '').upper()
-                            report_date = item.get('date', report_date)
-
-                            if 'FII' in category or 'FPI' in category:
-                                fii_data = {
-                                    'buy': float(str(item.get('buyValue', 0)).replace(',', '') or 0),
-                                    'sell': float(str(item.get('sellValue', 0)).replace(',', '') or 0),
-                                    'net': float(str(item.get('netValue', 0)).replace(',', '') or 0)
-                                }
-
-                            elif 'DII' in category:
-                                dii_data = {
-                                    'buy': float(str(item.get('buyValue', 0)).replace(',', '') or 0),
-                                    'sell': float(str(item.get('sellValue', 0)).replace(',', '') or 0),
-                                    'net': float(str(item.get('netValue', 0)).replace(',', '') or 0)
-                                }
-
-                if fii_data or dii_data:
-                    print("✅ Fetched from NSE API")
-                    return {
-                        'fii': fii_data,
-                        'dii': dii_data,
-                        'status': 'success',
-                        'source': 'NSE API',
-                        'fetched_at': datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC'),
-                        'date': report_date or datetime.utcnow().strftime('%d-%b-%Y')
-                    }
+            if isinstance(data, list):
+                for item in data:
+                    if isinstance(item, dict):
+                        category = item.get('category', '').upper()
+                        report_date = item.get('date', report_date)
+
+                        if 'FII' in category or 'FPI' in category:
+                            fii_data = {
+                                'buy': float(str(item.get('buyValue', 0)).replace(',', '') or 0),
+                                'sell': float(str(item.get('sellValue', 0)).replace(',', '') or 0),
+                                'net': float(str(item.get('netValue', 0)).replace(',', '') or 0)
+                            }
+
+                        elif 'DII' in category:
+                            dii_data = {
+                                'buy': float(str(item.get('buyValue', 0)).replace(',', '') or 0),
+                                'sell': float(str(item.get('sellValue', 0)).replace(',', '') or 0),
+                                'net': float(str(item.get('netValue', 0)).replace(',', '') or 0)
+                            }
+
+            if fii_data or dii_data:
+                print("✅ Fetched from NSE API")
+                return {
+                    'fii': fii_data,
+                    'dii': dii_data,
+                    'status': 'success',
+                    'source': 'NSE API',
+                    'fetched_at': datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC'),
+                    'date': report_date or datetime.utcnow().strftime('%d-%b-%Y')
+                }
     except Exception as e:
         print(f"❌ NSE API failed: {e}")
     
     return None
 
 
+# MoneyControl's daily FII/DII tables (bs4's class_=['tbldata14', 'mctable1'])
+MONEYCONTROL_TABLES_XPATH = (
+    "//table[contains(concat(' ', normalize-space(@class), ' '), ' tbldata14 ')"
+    " or contains(concat(' ', normalize-space(@class), ' '), ' mctable1 ')]"
+)
+
+
 def fetch_fii_dii_from_moneycontrol():
     """Fallback: Fetch from MoneyControl if NSE fails"""
     try:
-        from bs4 import BeautifulSoup
-        
         url = "https://www.moneycontrol.com/stocks/marketstats/fii_dii_activity/index.php"
         headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
 
         response = requests.get(url, headers=headers, timeout=15)
         if response.status_code == 200:
-            soup = BeautifulSoup(response.text, 'html.parser')
-            tables = soup.find_all('table', class_=['tbldata14', 'mctable1'])
-            
+            # Only the daily activity tables (same class filter as before); lxml
+            # selects them and read_html's C parser builds the frames
+            doc = lxml.html.fromstring(response.content)
+            tables = doc.xpath(MONEYCONTROL_TABLES_XPATH)
+            frames = pd.read_html(
+                StringIO(''.join(lxml.html.tostring(t, encoding='unicode') for t in tables)),
+                flavor='lxml') if tables else []
+
             fii_data = None
             dii_data = None
 
-            for table in tables:
-                for row in table.find_all('tr'):
-                    cells = row.find_all(['td', 'th'])
-                    if len(cells) >= 4:
-                        row_text = cells[0].get_text().strip()
-                        try:
-                            if 'FII' in row_text or 'FPI' in row_text:
-                                fii_data = {
-                                    'buy': float(cells[1].get_text().strip().replace(',', '') or 0),
-                                    'sell': float(cells[2].get_text().strip().replace(',', '') or 0),
-                                    'net': float(cells[3].get_text().strip().replace(',', '') or 0)
-                                }
-                            elif 'DII' in row_text:
-                                dii_data = {
-                                    'buy': float(cells[1].get_text().strip().replace(',', '') or 0),
-                                    'sell': float(cells[2].get_text().strip().replace(',', '') or 0),
-                                    'net': float(cells[3].get_text().strip().replace(',', '') or 0)
-                                }
-                        except:
-                            pass
+            for table in frames:
+                if table.shape[1] < 4:
+                    continue
+                labels = table.iloc[:, 0].astype(str)
+                # Empty cells count as 0; rows with non-numeric cells are skipped
+                values = table.iloc[:, 1:4].apply(
+                    lambda col: pd.to_numeric(
+                        col.fillna('').astype(str).str.strip().str.replace(',', '').replace('', '0'),
+                        errors='coerce'))
+                for label, (buy, sell, net) in zip(labels, values.itertuples(index=False)):
+                    if pd.isna(buy) or pd.isna(sell) or pd.isna(net):
+                        continue
+                    flows = {'buy': float(buy), 'sell': float(sell), 'net': float(net)}
+                    if 'FII' in label or 'FPI' in label:
+                        fii_data = flows
+                    elif 'DII' in label:
+                        dii_data = flows
 
             if fii_data or dii_data:
                 print("✅ Fetched from MoneyControl")
@@ -3,7 +3,12 @@ File Management for Stock Lists and Portfolio
 Handles saving, loading, listing, and deleting custom stock lists and portfolio data.
 """
 
+import fcntl  # For file locking (Unix/Mac compatible)
+import json
 import os
+import tempfile
+import threading
+from contextlib import contextmanager
 from typing import List, Optional, Dict
 import pandas as pd
 from config import SAVED_LISTS_DIR
@@ -11,6 +16,16 @@ from config import SAVED_LISTS_DIR
 # Portfolio file path
 PORTFOLIO_FILE = os.path.join(SAVED_LISTS_DIR, "portfolio.csv")
 
+# All saved lists live in one catalog: {list_name: [symbols...]}
+SAVED_LISTS_FILE = os.path.join(SAVED_LISTS_DIR, "saved_lists.json")
+# Lock file guarding catalog read-modify-write across sessions and processes
+SAVED_LISTS_LOCK = SAVED_LISTS_FILE + ".lock"
+# Legacy per-list CSVs already imported, {filename: mtime}; the CSVs themselves
+# are left in place (some are tracked in git)
+IMPORTED_CSV_FILE = os.path.join(SAVED_LISTS_DIR, "saved_lists_imported.json")
+
+_CATALOG_LOCK = threading.Lock()
+
 
 def ensure_saved_lists_dir() -> None:
     """Ensure the saved lists directory exists."""
@@ -21,58 +36,125 @@ def ensure_saved_lists_dir() -> None:
             f.write("")
 
 
-def save_list_to_csv(list_name: str, stocks: List[str]) -> bool:
-    """Save a stock list to CSV. Returns True if successful."""
+@contextmanager
+def _catalog_lock():
+    """Hold the catalog lock (threads in this process, then other processes)."""
+    ensure_saved_lists_dir()
+    with _CATALOG_LOCK:
+        with open(SAVED_LISTS_LOCK, "a") as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def _read_json(path: str) -> dict:
+    """Read a JSON object; a missing file means empty."""
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_json(path: str, data: dict) -> None:
+    """Write JSON via a unique temp file + os.replace so readers never see half-written data."""
+    fd, tmp_path = tempfile.mkstemp(dir=SAVED_LISTS_DIR, prefix=".saved_lists.", suffix=".tmp")
     try:
-        ensure_saved_lists_dir()
-        filename = os.path.join(SAVED_LISTS_DIR, f"{list_name}.csv")
-        pd.DataFrame({"Symbol": stocks}).to_csv(filename, index=False)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _read_catalog() -> Dict[str, List[str]]:
+    """Read the saved-lists catalog; missing file means no lists."""
+    return _read_json(SAVED_LISTS_FILE)
+
+
+def _import_csv_lists() -> None:
+    """Fold legacy per-list CSV files into the JSON catalog (call with the catalog lock held).
+
+    Each CSV is read once and remembered by mtime, so later loads skip the
+    pandas parse; a CSV that changes (e.g. updated by git pull) is re-imported.
+    The files are never removed or renamed.
+    """
+    imported = _read_json(IMPORTED_CSV_FILE)
+    pending = {}
+    for file in os.listdir(SAVED_LISTS_DIR):
+        if file.endswith(".csv") and file != "portfolio.csv":
+            mtime = os.path.getmtime(os.path.join(SAVED_LISTS_DIR, file))
+            if imported.get(file) != mtime:
+                pending[file] = mtime
+    if not pending:
+        return
+
+    catalog = _read_catalog()
+    for file, mtime in pending.items():
+        list_name = os.path.splitext(file)[0]
+        try:
+            df = pd.read_csv(os.path.join(SAVED_LISTS_DIR, file))
+            stocks = df["Symbol"].dropna().astype(str).tolist()
+        except Exception as e:
+            print(f"⚠️ Error importing list '{list_name}': {e}")
+            continue
+        if stocks:
+            if file in imported:
+                catalog[list_name] = stocks  # File changed since last import
+            else:
+                catalog.setdefault(list_name, stocks)  # Catalog entries win on first import
+        imported[file] = mtime
+    _write_json(SAVED_LISTS_FILE, catalog)
+    _write_json(IMPORTED_CSV_FILE, imported)
+
+
+def save_list_to_json(list_name: str, stocks: List[str]) -> bool:
+    """Save a stock list to the JSON catalog. Returns True if successful."""
+    try:
+        with _catalog_lock():
+            catalog = _read_catalog()
+            catalog[list_name] = list(stocks)
+            _write_json(SAVED_LISTS_FILE, catalog)
         return True
     except Exception as e:
         print(f"⚠️ Error saving list '{list_name}': {e}")
         return False
 
 
-def load_list_from_csv(list_name: str) -> Optional[List[str]]:
-    """Load a stock list from CSV. Returns list of symbols or None."""
-    filename = os.path.join(SAVED_LISTS_DIR, f"{list_name}.csv")
-    if not os.path.exists(filename):
-        return None
-
+def load_list_from_json(list_name: str) -> Optional[List[str]]:
+    """Load a stock list from the JSON catalog. Returns list of symbols or None."""
     try:
-        df = pd.read_csv(filename)
-        return df["Symbol"].dropna().astype(str).tolist()
+        return _read_catalog().get(list_name)
     except Exception as e:
         print(f"⚠️ Error loading list '{list_name}': {e}")
         return None
 
 
-def delete_list_csv(list_name: str) -> bool:
-    """Delete a stock list CSV file."""
-    filename = os.path.join(SAVED_LISTS_DIR, f"{list_name}.csv")
-    if os.path.exists(filename):
-        try:
-            os.remove(filename)
-            return True
-        except Exception as e:
-            print(f"⚠️ Error deleting list '{list_name}': {e}")
-            return False
-    return False
+def delete_list_json(list_name: str) -> bool:
+    """Delete a stock list from the JSON catalog."""
+    try:
+        with _catalog_lock():
+            catalog = _read_catalog()
+            if catalog.pop(list_name, None) is None:
+                return False
+            _write_json(SAVED_LISTS_FILE, catalog)
+        return True
+    except Exception as e:
+        print(f"⚠️ Error deleting list '{list_name}': {e}")
+        return False
 
 
 def load_all_saved_lists() -> Dict[str, List[str]]:
-    """Load all saved stock lists from directory."""
-    ensure_saved_lists_dir()
-    saved_lists = {}
-
-    for file in os.listdir(SAVED_LISTS_DIR):
-        if file.endswith(".csv") and file != "portfolio.csv":  # Exclude portfolio file
-            list_name = os.path.splitext(file)[0]
-            stocks = load_list_from_csv(list_name)
-            if stocks:
-                saved_lists[list_name] = stocks
-
-    return saved_lists
+    """Load all saved stock lists from the JSON catalog."""
+    try:
+        with _catalog_lock():
+            _import_csv_lists()
+    except Exception as e:
+        print(f"⚠️ Error importing saved CSV lists: {e}")
+    return {name: stocks for name, stocks in _read_catalog().items() if stocks}
 
 
 # ==================== Portfolio Management ====================
@@ -3,6 +3,8 @@ Portfolio Manager - Core logic for portfolio tracking
 Handles portfolio calculations, metrics, and data management
 """
 
+import heapq
+import numpy as np
 import pandas as pd
 from datetime import datetime
 from typing import Dict, List, Tuple
@@ -41,40 +43,38 @@ def calculate_portfolio_metrics(holdings: List[Dict], current_prices: Dict[str,
             'holdings_with_pnl': []
         }
     
-    holdings_with_pnl = []
-    total_invested = 0.0
-    total_current = 0.0
-    
-    for holding in holdings:
-        symbol = holding['stock_symbol']
-        quantity = float(holding['quantity'])
-        buy_price = float(holding['buy_price'])
-        
-        # Get current price
-        current_price = current_prices.get(symbol, buy_price)
-        
-        # Calculate metrics for this holding
-        invested = quantity * buy_price
-        current_value = quantity * current_price
-        pnl = current_value - invested
-        pnl_pct = (pnl / invested * 100) if invested > 0 else 0.0
-        
-        # Add to holding dict
-        holding_with_pnl = {
+    # Vectorized per-holding math over parallel arrays (qty, buy price, current price)
+    quantities = np.array([float(h['quantity']) for h in holdings], dtype=np.float64)
+    buy_prices = np.array([float(h['buy_price']) for h in holdings], dtype=np.float64)
+    last_prices = np.array(
+        [current_prices.get(h['stock_symbol'], bp) for h, bp in zip(holdings, buy_prices)],
+        dtype=np.float64
+    )
+    
+    invested = quantities * buy_prices
+    current_values = quantities * last_prices
+    pnls = current_values - invested
+    safe_invested = np.where(invested > 0, invested, 1.0)
+    pnl_pcts = np.where(invested > 0, pnls / safe_invested * 100, 0.0)
+    
+    holdings_with_pnl = [
+        {
             **holding,
             'current_price': current_price,
-            'invested': invested,
-            'current_value': current_value,
+            'invested': inv,
+            'current_value': value,
             'pnl': pnl,
             'pnl_pct': pnl_pct
         }
-        holdings_with_pnl.append(holding_with_pnl)
-        
-        # Accumulate totals
-        total_invested += invested
-        total_current += current_value
+        for holding, current_price, inv, value, pnl, pnl_pct in zip(
+            holdings, last_prices.tolist(), invested.tolist(),
+            current_values.tolist(), pnls.tolist(), pnl_pcts.tolist()
+        )
+    ]
     
     # Calculate portfolio totals
+    total_invested = float(invested.sum())
+    total_current = float(current_values.sum())
     total_pnl = total_current - total_invested
     total_pnl_pct = (total_pnl / total_invested * 100) if total_invested > 0 else 0.0
     
@@ -108,6 +108,14 @@ def get_sector_allocation(holdings_with_pnl: List[Dict]) -> Dict[str, float]:
     return {}
 
 
+def _average_pnl_by_symbol(holdings_with_pnl: List[Dict]) -> List[Tuple[str, float]]:
+    """Average P&L% per unique stock symbol (duplicates share one entry), in first-seen order"""
+    stock_pnl = {}
+    for h in holdings_with_pnl:
+        stock_pnl.setdefault(h['stock_symbol'], []).append(h.get('pnl_pct', 0))
+    return [(symbol, sum(pnls) / len(pnls)) for symbol, pnls in stock_pnl.items()]
+
+
 def get_top_performers(holdings_with_pnl: List[Dict], top_n: int = 3) -> List[Tuple[str, float]]:
     """
     Get top N performing stocks by P&L percentage (unique stocks only)
@@ -122,25 +130,8 @@ def get_top_performers(holdings_with_pnl: List[Dict], top_n: int = 3) -> List[Tu
     if not holdings_with_pnl:
         return []
     
-    # Group by stock symbol and calculate average P&L% for duplicates
-    stock_pnl = {}
-    for h in holdings_with_pnl:
-        symbol = h['stock_symbol']
-        pnl_pct = h.get('pnl_pct', 0)
-        
-        if symbol in stock_pnl:
-            # Average P&L% for same stock with multiple entries
-            stock_pnl[symbol].append(pnl_pct)
-        else:
-            stock_pnl[symbol] = [pnl_pct]
-    
-    # Calculate average and create list
-    unique_stocks = [(symbol, sum(pnls) / len(pnls)) for symbol, pnls in stock_pnl.items()]
-    
-    # Sort by P&L percentage descending
-    sorted_stocks = sorted(unique_stocks, key=lambda x: x[1], reverse=True)
-    
-    return sorted_stocks[:top_n]
+    # Partial selection instead of sorting every unique stock
+    return heapq.nlargest(top_n, _average_pnl_by_symbol(holdings_with_pnl), key=lambda x: x[1])
 
 
 def get_worst_performers(holdings_with_pnl: List[Dict], bottom_n: int = 3) -> List[Tuple[str, float]]:
@@ -157,25 +148,8 @@ def get_worst_performers(holdings_with_pnl: List[Dict], bottom_n: int = 3) -> Li
     if not holdings_with_pnl:
         return []
     
-    # Group by stock symbol and calculate average P&L% for duplicates
-    stock_pnl = {}
-    for h in holdings_with_pnl:
-        symbol = h['stock_symbol']
-        pnl_pct = h.get('pnl_pct', 0)
-        
-        if symbol in stock_pnl:
-            # Average P&L% for same stock with multiple entries
-            stock_pnl[symbol].append(pnl_pct)
-        else:
-            stock_pnl[symbol] = [pnl_pct]
-    
-    # Calculate average and create list
-    unique_stocks = [(symbol, sum(pnls) / len(pnls)) for symbol, pnls in stock_pnl.items()]
-    
-    # Sort by P&L percentage ascending (worst first)
-    sorted_stocks = sorted(unique_stocks, key=lambda x: x[1])
-    
-    return sorted_stocks[:bottom_n]
+    # Partial selection instead of sorting every unique stock (worst first)
+    return heapq.nsmallest(bottom_n, _average_pnl_by_symbol(holdings_with_pnl), key=lambda x: x[1])
 
 
 def validate_holding_input(symbol: str, quantity: float, buy_price: float, buy_date: str) -> Tuple[bool, str]:
@@ -3,7 +3,6 @@ Security Enhancement Functions
 Quick fixes for identified security vulnerabilities
 """
 
-import html
 import secrets
 import hmac
 import hashlib
@@ -15,6 +14,16 @@ import streamlit as st
 # FIX 1: HTML Sanitization (XSS Prevention)
 # =====================================================
 
+# Same replacements as html.escape(quote=True), applied in a single C-level pass
+_HTML_ESCAPE_TABLE = str.maketrans({
+    '&': '&amp;',
+    '<': '&lt;',
+    '>': '&gt;',
+    '"': '&quot;',
+    "'": '&#x27;',
+})
+
+
 def sanitize_html(text):
     """
     Escape HTML characters to prevent XSS attacks.
@@ -26,7 +35,7 @@ def sanitize_html(text):
     """
     if text is None:
         return ""
-    return html.escape(str(text))
+    return str(text).translate(_HTML_ESCAPE_TABLE)
 
 
 def sanitize_dict_for_html(data_dict):
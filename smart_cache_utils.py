@@ -3,7 +3,11 @@ Smart caching utilities for stock data based on market status
 Implements intelligent cache TTL based on weekends, holidays, and market hours
 """
 
+import time
+import threading
+from functools import wraps
 import pytz
+import streamlit as st
 from datetime import datetime, timedelta
 
 
@@ -124,3 +128,93 @@ def get_cache_info_message():
         return "📈 Market open - Data refreshes every 5 minutes"
     else:
         return "🌙 After hours - Data refreshes every hour"
+
+
+# Freshness needs per data kind (seconds). 'intraday' follows the market-aware
+# smart TTL; slow-moving data gets long TTLs regardless of market status.
+DATA_KIND_TTLS = {
+    '52w': 86400,             # 52-week range - refreshed daily (hourly while market open)
+    'stock_list': 7 * 86400,  # Index composition - changes a few times a year
+    'sectoral': 86400,        # Sectoral 1-year performance - daily
+}
+
+
+def ttl_for(kind):
+    """
+    Returns cache TTL (in seconds) for a data kind:
+    - 'intraday': 2 min while market is open, else smart TTL (1 hour closed / 24 hours weekend & holiday)
+    - '52w': 1 hour while market is open (current price moves), else 24 hours
+    - 'stock_list': 7 days
+    - 'sectoral': 24 hours
+    """
+    if kind == 'intraday':
+        return 120 if _is_market_open() else get_smart_cache_ttl()
+    if kind == '52w' and _is_market_open():
+        return 3600
+    return DATA_KIND_TTLS[kind]
+
+
+def ttl_bucket(kind):
+    """
+    Hashable time-bucket for passing into @st.cache_data functions.
+    st.cache_data's ttl is fixed at decoration time, so callers pass this as an
+    argument: the key rolls over every ttl_for(kind) seconds.
+    """
+    ttl = ttl_for(kind)
+    return ttl, int(time.time() // ttl)
+
+
+# Process-wide hit/miss counters for tracked st.cache_data functions
+_CACHE_COUNTERS = {}
+_CACHE_COUNTERS_LOCK = threading.Lock()
+
+
+def _count(name, field):
+    with _CACHE_COUNTERS_LOCK:
+        counters = _CACHE_COUNTERS.setdefault(name, {'calls': 0, 'misses': 0})
+        counters[field] += 1
+
+
+def tracked_cache_data(name=None, **cache_kwargs):
+    """
+    Drop-in for @st.cache_data(**cache_kwargs) that also counts hits/misses.
+    Calls are counted on the way in; misses when the cached body actually runs.
+    """
+    def decorator(func):
+        label = name or func.__name__
+
+        @wraps(func)
+        def body(*args, **kwargs):
+            _count(label, 'misses')
+            return func(*args, **kwargs)
+
+        cached = st.cache_data(**cache_kwargs)(body)
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            _count(label, 'calls')
+            return cached(*args, **kwargs)
+
+        wrapper.clear = cached.clear
+        return wrapper
+    return decorator
+
+
+def get_cache_hit_stats():
+    """
+    Returns per-function cache stats since process start:
+    list of dicts with name, calls, hits, misses, hit_rate (%).
+    """
+    with _CACHE_COUNTERS_LOCK:
+        snapshot = {k: dict(v) for k, v in _CACHE_COUNTERS.items()}
+    rows = []
+    for label, c in sorted(snapshot.items()):
+        hits = max(0, c['calls'] - c['misses'])
+        rows.append({
+            'name': label,
+            'calls': c['calls'],
+            'hits': hits,
+            'misses': c['misses'],
+            'hit_rate': round(100 * hits / c['calls'], 1) if c['calls'] else 0.0,
+        })
+    return rows
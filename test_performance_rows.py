@@ -0,0 +1,84 @@
+"""
+Tests for the vectorized performance rows against per-ticker iloc lookups
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_fetchers import LOOKBACK_COLUMNS, _performance_rows
+
+
+def reference_row(closes):
+    """Per-ticker semantics the vectorized rows replaced (one series, iloc lookbacks)."""
+    closes = closes.dropna()
+    current = float(closes.iloc[-1])
+
+    def price_n_days_ago(trading_days):
+        if len(closes) < trading_days + 1:
+            # Not enough data, earliest available price
+            return float(closes.iloc[0])
+        return float(closes.iloc[-1 - trading_days])
+
+    row = {}
+    for column, days in zip(LOOKBACK_COLUMNS, (1, 5, 21, 42, 63)):
+        base = price_n_days_ago(days)
+        row[column] = round((current - base) / base * 100 if base else 0.0, 2)
+
+    prices = closes.iloc[-60:].tolist()
+    price_range = max(prices) - min(prices)
+    if price_range > 0:
+        row['sparkline_data'] = [(p - min(prices)) / price_range * 100 for p in prices]
+    else:
+        row['sparkline_data'] = [50] * len(prices)
+    return current, row
+
+
+@pytest.fixture
+def ragged_closes():
+    rng = np.random.default_rng(7)
+    index = pd.bdate_range('2024-01-01', periods=120)
+    frame = pd.DataFrame(
+        rng.uniform(50, 150, size=(len(index), 5)), index=index,
+        columns=['FULL.NS', 'HOLIDAYS.NS', 'RECENT.NS', 'SHORT.NS', 'SINGLE.NS'])
+    frame.iloc[[10, 40, 95, 110, 117], 1] = np.nan  # Exchange holidays mid-series
+    frame.iloc[:90, 2] = np.nan                     # Listed 30 days ago: < 42/63-day lookbacks
+    frame.iloc[:117, 3] = np.nan                    # Three rows: < 5-day lookback
+    frame.iloc[:119, 4] = np.nan                    # One row: every change is 0%
+    frame.iloc[-1, 0] = np.nan                      # No bar yet today for this one
+    return frame
+
+
+def test_rows_match_per_ticker_iloc_lookups(ragged_closes):
+    rows = _performance_rows(ragged_closes)
+
+    assert [row['Ticker'] for row in rows] == list(ragged_closes.columns)
+    for row in rows:
+        current, expected = reference_row(ragged_closes[row['Ticker']])
+        assert row['Current Price'] == round(current, 2)
+        for column in LOOKBACK_COLUMNS:
+            assert row[column] == pytest.approx(expected[column], abs=1e-9), (row['Ticker'], column)
+        assert row['sparkline_data'] == pytest.approx(expected['sparkline_data'])
+
+
+def test_single_row_is_zero_percent(ragged_closes):
+    row = _performance_rows(ragged_closes[['SINGLE.NS']])[0]
+
+    assert row['Today %'] == 0.0
+    assert all(row[column] == 0.0 for column in LOOKBACK_COLUMNS)
+    assert row['sparkline_data'] == [50.0]
+
+
+def test_short_history_clamps_to_earliest_price(ragged_closes):
+    short = ragged_closes['SHORT.NS'].dropna()
+    row = _performance_rows(ragged_closes[['SHORT.NS']])[0]
+
+    earliest_change = round((short.iloc[-1] - short.iloc[0]) / short.iloc[0] * 100, 2)
+    assert row['Today %'] == round((short.iloc[-1] - short.iloc[-2]) / short.iloc[-2] * 100, 2)
+    assert row['1 Week %'] == row['3 Months %'] == earliest_change
+
+
+def test_all_nan_columns_are_skipped(ragged_closes):
+    frame = ragged_closes.assign(**{'DELISTED.NS': np.nan})
+
+    assert [row['Ticker'] for row in _performance_rows(frame)] == list(ragged_closes.columns)
+    assert _performance_rows(frame[['DELISTED.NS']]) == []
@@ -0,0 +1,112 @@
+"""
+Tests for splicing a stored daily Close history with a freshly downloaded tail
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+import cache_manager
+from data_fetchers import _splice_history
+
+
+def closes(start, values, tz=None):
+    index = pd.bdate_range(start, periods=len(values), tz=tz)
+    return pd.Series(values, index=index, dtype=float, name='Close')
+
+
+def test_matching_overlap_extends_history():
+    stored = closes('2024-01-01', np.arange(100.0, 120.0))
+    # Re-downloaded tail: last 5 stored days (last one revised intraday) + 3 new days
+    recent = closes(stored.index[-5], [115.0, 116.0, 117.0, 118.0, 119.7, 120.0, 121.0, 122.0])
+
+    merged = _splice_history(stored, recent)
+
+    assert merged is not None
+    assert merged.index.is_monotonic_increasing and merged.index.is_unique
+    assert len(merged) == len(stored) + 3
+    # The stored mid-session close is replaced by the downloaded one
+    assert merged[stored.index[-1]] == 119.7
+    assert merged.iloc[-1] == 122.0
+    pd.testing.assert_series_equal(merged[:len(stored) - 5], stored[:-5], check_freq=False)
+
+
+def test_small_differences_within_tolerance_still_splice():
+    stored = closes('2024-01-01', np.arange(100.0, 110.0))
+    recent = closes(stored.index[-4], [106.05, 107.0, 108.0, 109.0, 110.0])
+
+    assert _splice_history(stored, recent) is not None
+
+
+def test_split_mismatch_forces_full_download():
+    stored = closes('2024-01-01', np.arange(100.0, 110.0))
+    # A 2:1 split re-adjusts every past close in the download
+    recent = closes(stored.index[-4], [53.0, 53.5, 54.0, 54.5, 55.0])
+
+    assert _splice_history(stored, recent) is None
+
+
+def test_tail_without_overlap_forces_full_download():
+    stored = closes('2024-01-01', np.arange(100.0, 110.0))
+    recent = closes(stored.index[-1] + pd.offsets.BDay(3), [111.0, 112.0])
+
+    assert _splice_history(stored, recent) is None
+
+
+def test_only_last_stored_row_overlapping_is_not_enough():
+    stored = closes('2024-01-01', np.arange(100.0, 110.0))
+    recent = closes(stored.index[-1], [109.0, 110.0])
+
+    assert _splice_history(stored, recent) is None
+
+
+def test_gaps_in_download_are_dropped_before_comparing():
+    stored = closes('2024-01-01', np.arange(100.0, 110.0))
+    recent = closes(stored.index[-4], [106.0, np.nan, 108.0, 109.0, np.nan, 111.0])
+
+    merged = _splice_history(stored, recent)
+
+    assert merged is not None
+    assert not merged.isna().any()
+    # A day missing from the download is missing from the spliced tail too
+    assert stored.index[-3] not in merged.index
+    assert merged.iloc[-1] == 111.0
+
+
+def test_empty_download_returns_none():
+    stored = closes('2024-01-01', np.arange(100.0, 110.0))
+
+    assert _splice_history(stored, closes('2024-02-01', [np.nan, np.nan])) is None
+
+
+def test_timezone_aware_download_lines_up_with_naive_store():
+    stored = closes('2024-01-01', np.arange(100.0, 110.0))
+    recent = closes(stored.index[-4], [106.0, 107.0, 108.0, 109.0, 110.0], tz='Asia/Kolkata')
+
+    merged = _splice_history(stored, recent)
+
+    assert merged is not None
+    assert merged.index.tz is None
+    assert len(merged) == len(stored) + 1
+
+
+def test_result_is_trimmed_to_six_months():
+    stored = closes('2023-01-02', np.linspace(100.0, 200.0, 300))
+    recent = closes(stored.index[-3], [stored.iloc[-3], stored.iloc[-2], 201.0, 202.0])
+
+    merged = _splice_history(stored, recent)
+
+    assert merged is not None
+    assert merged.index[0] > merged.index[-1] - pd.DateOffset(months=6)
+    assert merged.iloc[-1] == 202.0
+
+
+@pytest.mark.skipif(not cache_manager.PARQUET_AVAILABLE, reason="pyarrow not installed")
+def test_history_store_round_trip(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache_manager, 'HISTORY_DIR', str(tmp_path))
+    stored = closes('2024-01-01', np.arange(100.0, 110.0))
+
+    assert cache_manager.save_history('TEST.NS', stored)
+    loaded = cache_manager.load_history('TEST.NS')
+
+    pd.testing.assert_series_equal(loaded, stored, check_freq=False)
+    assert cache_manager.load_history('MISSING.NS') is None
@@ -3,109 +3,166 @@ UI Components for NSE Stock Performance Tracker
 Streamlit UI rendering functions
 """
 
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import streamlit as st
-from config import INDICES_ROW1, INDICES_ROW2, METRIC_CSS
-from data_fetchers import get_index_performance, get_commodities_prices, get_stock_list, get_next_nse_holiday, get_fii_dii_data, get_highest_volume_stocks
-from utils import get_current_times, format_time_display, get_ticker_data, get_market_session_status
+from config import CUSTOM_CSS, INDICES_ROW1, INDICES_ROW2, METRIC_CSS
+from data_fetchers import get_all_index_performance, get_ticker, get_commodities_prices, get_stock_list, get_next_nse_holiday, get_fii_dii_data, get_highest_volume_stocks
+import pandas as pd
+from utils import get_current_times, format_time_display, get_ticker_data, get_market_session_status, minify_css, PERCENT_COLUMNS, COLOR_GREEN, COLOR_RED
 
+# Page-wide styles for app.py, minified here because app.py itself is
+# re-executed on every rerun while this module is imported once
+PAGE_CSS = minify_css(CUSTOM_CSS)
 
-# =========================
-# HEADER SECTION
-# =========================
-def render_header():
-    """Render app header with title, time, and commodities"""
-    # Box styling for header sections
-    st.markdown("""
-    <style>
-        /* Beautiful box styling for header sections - Navy Blue Theme */
-        .info-box {
-            background: linear-gradient(135deg, rgba(26, 35, 126, 0.3) 0%, rgba(13, 27, 42, 0.5) 100%) !important;
-            border: 1px solid rgba(66, 165, 245, 0.3) !important;
-            border-radius: 12px !important;
-            padding: 0.75rem !important;
-            box-shadow: 0 4px 12px rgba(0, 0, 0, 0.4), 0 0 20px rgba(66, 165, 245, 0.1) !important;
-            transition: all 0.3s ease !important;
-            margin-bottom: 0.5rem !important;
-        }
-        
-        .info-box:hover {
-            background: linear-gradient(135deg, rgba(26, 35, 126, 0.5) 0%, rgba(13, 71, 161, 0.3) 100%) !important;
-            border-color: rgba(66, 165, 245, 0.6) !important;
-            transform: translateY(-3px) !important;
-            box-shadow: 0 6px 20px rgba(0, 0, 0, 0.5), 0 0 30px rgba(66, 165, 245, 0.2) !important;
+_METRIC_CSS = minify_css(METRIC_CSS)
+
+# Static header styles (info boxes, title, mobile layout), minified once per process
+_HEADER_CSS = minify_css("""
+<style>
+    /* Beautiful box styling for header sections - Navy Blue Theme */
+    .info-box {
+        background: linear-gradient(135deg, rgba(26, 35, 126, 0.3) 0%, rgba(13, 27, 42, 0.5) 100%) !important;
+        border: 1px solid rgba(66, 165, 245, 0.3) !important;
+        border-radius: 12px !important;
+        padding: 0.75rem !important;
+        box-shadow: 0 4px 12px rgba(0, 0, 0, 0.4), 0 0 20px rgba(66, 165, 245, 0.1) !important;
+        transition: all 0.3s ease !important;
+        margin-bottom: 0.5rem !important;
+    }
+    
+    .info-box:hover {
+        background: linear-gradient(135deg, rgba(26, 35, 126, 0.5) 0%, rgba(13, 71, 161, 0.3) 100%) !important;
+        border-color: rgba(66, 165, 245, 0.6) !important;
+        transform: translateY(-3px) !important;
+        box-shadow: 0 6px 20px rgba(0, 0, 0, 0.5), 0 0 30px rgba(66, 165, 245, 0.2) !important;
+    }
+    
+    .info-box-title {
+        font-size: 0.875rem !important;
+        font-weight: 600 !important;
+        color: #42a5f5 !important;
+        margin-bottom: 0.5rem !important;
+        text-transform: uppercase !important;
+        letter-spacing: 0.5px !important;
+        border-bottom: 1px solid rgba(66, 165, 245, 0.3) !important;
+        padding-bottom: 0.4rem !important;
+    }
+
+    .market-overview-title {
+        display: flex;
+        align-items: center;
+        justify-content: space-between;
+        gap: 10px;
+    }
+
+    .market-overview-meta {
+        display: inline-flex;
+        align-items: center;
+        gap: 8px;
+        flex-wrap: wrap;
+        justify-content: flex-end;
+    }
+
+    .market-overview-status {
+        position: relative;
+        display: inline-flex;
+        align-items: center;
+        gap: 8px;
+        padding: 0;
+        font-weight: 700;
+        font-size: 0.8rem;
+        letter-spacing: 0.5px;
+        text-transform: uppercase;
+        white-space: nowrap;
+        color: var(--status-color, #42a5f5);
+        background: transparent !important;
+        border: none !important;
+        box-shadow: none !important;
+    }
+
+
+    .market-overview-updated {
+        color: #95e1d3;
+        font-size: 0.78rem;
+        white-space: nowrap;
+    }
+
+    .market-overview-updated span {
+        color: #42a5f5;
+        font-weight: 600;
+    }
+
+    @media (max-width: 768px) {
+        .header-title {
+            font-size: 1.4rem !important;
         }
-        
-        .info-box-title {
+        .header-subtitle {
             font-size: 0.875rem !important;
-            font-weight: 600 !important;
-            color: #42a5f5 !important;
-            margin-bottom: 0.5rem !important;
-            text-transform: uppercase !important;
-            letter-spacing: 0.5px !important;
-            border-bottom: 1px solid rgba(66, 165, 245, 0.3) !important;
-            padding-bottom: 0.4rem !important;
-        }
-
-        .market-overview-title {
-            display: flex;
-            align-items: center;
-            justify-content: space-between;
-            gap: 10px;
         }
-
-        .market-overview-meta {
-            display: inline-flex;
-            align-items: center;
-            gap: 8px;
-            flex-wrap: wrap;
-            justify-content: flex-end;
+        /* Force single column on mobile */
+        div[data-testid="column"] {
+            width: 100% !important;
+            flex: 1 1 100% !important;
+            min-width: 100% !important;
         }
+    }
+</style>
+""")
 
-        .market-overview-status {
-            position: relative;
-            display: inline-flex;
-            align-items: center;
-            gap: 8px;
-            padding: 0;
-            font-weight: 700;
-            font-size: 0.8rem;
-            letter-spacing: 0.5px;
-            text-transform: uppercase;
-            white-space: nowrap;
-            color: var(--status-color, #42a5f5);
-            background: transparent !important;
-            border: none !important;
-            box-shadow: none !important;
-        }
+# Metric styles plus the inline sparkline positioning, sent as one block per indices render
+_INDICES_CSS = _METRIC_CSS + minify_css("""
+<style>
+    /* Make metric box relative for absolute positioning of chart */
+    div[data-testid="stMetric"] {
+        position: relative !important;
+    }
+    
+    /* Position chart absolutely inside metric, next to delta */
+    .mini-chart-inline {
+        position: absolute !important;
+        bottom: 10px !important;
+        right: 10px !important;
+        z-index: 10 !important;
+    }
+    
+    /* Add right padding to metric delta to make space for chart when chart exists */
+    .has-chart [data-testid="stMetricDelta"] {
+        margin-right: 60px !important;
+    }
+    
+    /* Loading skeleton animation */
+    .indices-loading {
+        background: linear-gradient(90deg, rgba(255,255,255,0.05) 25%, rgba(255,255,255,0.1) 50%, rgba(255,255,255,0.05) 75%);
+        background-size: 200% 100%;
+        animation: loading-shimmer 1.5s infinite;
+    }
+    @keyframes loading-shimmer {
+        0% { background-position: 200% 0; }
+        100% { background-position: -200% 0; }
+    }
+</style>
+""")
 
+# Every index shown in the banner and indices rows, fetched as one batch
+INDEX_SYMBOLS = tuple(dict.fromkeys([*INDICES_ROW1.values(), *INDICES_ROW2.values()]))
 
-        .market-overview-updated {
-            color: #95e1d3;
-            font-size: 0.78rem;
-            white-space: nowrap;
-        }
+# (name, symbol) pairs per indices row, and the domestic ones the gainer/loser banner ranks
+INDEX_ROW1_ITEMS = tuple(INDICES_ROW1.items())
+INDEX_ROW2_ITEMS = tuple(INDICES_ROW2.items())
+BANNER_EXCLUDED_INDICES = frozenset({'India VIX', 'Dow Jones', 'NASDAQ'})
+BANNER_INDEX_ITEMS = tuple(
+    (name, symbol) for name, symbol in INDEX_ROW1_ITEMS + INDEX_ROW2_ITEMS
+    if name not in BANNER_EXCLUDED_INDICES
+)
 
-        .market-overview-updated span {
-            color: #42a5f5;
-            font-weight: 600;
-        }
 
-        @media (max-width: 768px) {
-            .header-title {
-                font-size: 1.4rem !important;
-            }
-            .header-subtitle {
-                font-size: 0.875rem !important;
-            }
-            /* Force single column on mobile */
-            div[data-testid="column"] {
-                width: 100% !important;
-                flex: 1 1 100% !important;
-                min-width: 100% !important;
-            }
-        }
-    </style>
-    """, unsafe_allow_html=True)
+# =========================
+# HEADER SECTION
+# =========================
+def render_header():
+    """Render app header with title, time, and commodities"""
+    st.markdown(_HEADER_CSS, unsafe_allow_html=True)
     
     # Title section
     st.markdown('<h1 class="header-title">📊 Indian Stock Performance Tracker</h1>', unsafe_allow_html=True)
@@ -180,7 +237,7 @@ def render_header():
             volume_placeholder.markdown(loading_html, unsafe_allow_html=True)
             
             # Cached function to fetch high volume stocks once per day
-            @st.cache_data(ttl=86400, show_spinner=False)  # Cache for 24 hours
+            @st.cache_data(ttl=86400, show_spinner=False, max_entries=32)  # Cache for 24 hours
             def get_cached_volume_stocks(stock_symbols_tuple):
                 """Fetch high volume stocks with daily caching"""
                 print(f"📊 Fetching volume data from {len(stock_symbols_tuple)} ticker stocks (cached for 24h)")
@@ -250,12 +307,11 @@ def render_holiday_and_pe_info():
 # =========================
 # MARKET INDICES
 # =========================
-@st.cache_data(ttl=3600, show_spinner=False)
+@st.cache_data(ttl=3600, show_spinner=False, max_entries=64)
 def get_index_sparkline(symbol):
     """Get sparkline data for index (7 days)"""
-    import yfinance as yf
     try:
-        ticker = yf.Ticker(symbol)
+        ticker = get_ticker(symbol)
         hist = ticker.history(period='7d')
         if not hist.empty and len(hist) >= 2:
             prices = hist['Close'].tolist()
@@ -311,50 +367,22 @@ def create_index_sparkline_svg(sparkline_data, change_pct, symbol, width=50, hei
     </a>'''
 
 
+@st.fragment(run_every="5m")
 def render_market_indices():
-    """Render market indices performance section with mini charts"""
-    st.markdown(METRIC_CSS, unsafe_allow_html=True)
-    
-    # Add CSS to position chart next to percentage delta inside metric box
-    st.markdown("""
-    <style>
-        /* Make metric box relative for absolute positioning of chart */
-        div[data-testid="stMetric"] {
-            position: relative !important;
-        }
-        
-        /* Position chart absolutely inside metric, next to delta */
-        .mini-chart-inline {
-            position: absolute !important;
-            bottom: 10px !important;
-            right: 10px !important;
-            z-index: 10 !important;
-        }
-        
-        /* Add right padding to metric delta to make space for chart when chart exists */
-        .has-chart [data-testid="stMetricDelta"] {
-            margin-right: 60px !important;
-        }
-        
-        /* Loading skeleton animation */
-        .indices-loading {
-            background: linear-gradient(90deg, rgba(255,255,255,0.05) 25%, rgba(255,255,255,0.1) 50%, rgba(255,255,255,0.05) 75%);
-            background-size: 200% 100%;
-            animation: loading-shimmer 1.5s infinite;
-        }
-        @keyframes loading-shimmer {
-            0% { background-position: 200% 0; }
-            100% { background-position: -200% 0; }
-        }
-    </style>
-    """, unsafe_allow_html=True)
+    """Render market indices performance section with mini charts.
+
+    Runs as a fragment that re-renders itself every 5 minutes from the batched
+    index cache, so quotes stay current without rerunning the whole page.
+    """
+    st.markdown(_INDICES_CSS, unsafe_allow_html=True)
 
     # Row 1: Major Indices - Wrapped for mobile targeting
+    index_performance = get_all_index_performance(INDEX_SYMBOLS)
     st.markdown('<div class="metric-row">', unsafe_allow_html=True)
-    cols1 = st.columns(len(INDICES_ROW1))
-    for idx, (name, symbol) in enumerate(INDICES_ROW1.items()):
-        with cols1[idx]:
-            price, change = get_index_performance(symbol)
+    cols1 = st.columns(len(INDEX_ROW1_ITEMS))
+    for (name, symbol), col in zip(INDEX_ROW1_ITEMS, cols1):
+        with col:
+            price, change = index_performance[symbol]
             sparkline_data = get_index_sparkline(symbol)
             
             if price is not None and change is not None:
@@ -386,10 +414,10 @@ def render_market_indices():
 )
 
     st.markdown('<div class="metric-row">', unsafe_allow_html=True)
-    cols2 = st.columns(len(INDICES_ROW2))
-    for idx, (name, symbol) in enumerate(INDICES_ROW2.items()):
-        with cols2[idx]:
-            price, change = get_index_performance(symbol)
+    cols2 = st.columns(len(INDEX_ROW2_ITEMS))
+    for (name, symbol), col in zip(INDEX_ROW2_ITEMS, cols2):
+        with col:
+            price, change = index_performance[symbol]
             sparkline_data = get_index_sparkline(symbol)
             
             if price is not None and change is not None:
@@ -411,6 +439,50 @@ def render_market_indices():
     st.markdown("---")
 
 
+# =========================
+# MARKET DATA PREFETCH
+# =========================
+def _prefetch_nse_data():
+    """Warm the NSE API caches (FII/DII flows, holiday calendar) on the shared NSE session"""
+    get_fii_dii_data()
+    get_next_nse_holiday()
+
+
+@st.cache_resource
+def get_market_executor():
+    """Process-wide pool for market panel prefetch, reused across reruns and sessions.
+    
+    Sized for one task per panel plus one per index sparkline, so a cold
+    start overlaps every request. Never shut down.
+    """
+    return ThreadPoolExecutor(max_workers=4 + len(INDEX_SYMBOLS), thread_name_prefix="market-prefetch")
+
+
+def prefetch_market_panels():
+    """Start fetching banner, ticker and indices data concurrently in background threads.
+    
+    Only network I/O runs off the script thread; results land in st.cache_data
+    (which serializes concurrent misses per key), so the renderers stay
+    single-threaded and simply read warm caches. Pass the returned futures to
+    wait_for_prefetch() before rendering the panels.
+    """
+    executor = get_market_executor()
+    futures = [executor.submit(fn) for fn in (_prefetch_nse_data, get_weekly_sectoral_changes, get_ticker_data)]
+    futures.append(executor.submit(get_all_index_performance, INDEX_SYMBOLS))
+    # Sparklines are one Ticker.history call per index; overlap them instead of paying 12 serial RTTs
+    futures.extend(executor.submit(get_index_sparkline, symbol) for symbol in INDEX_SYMBOLS)
+    return futures
+
+
+def wait_for_prefetch(futures):
+    """Block until prefetch tasks finish; failures just fall back to on-demand fetching"""
+    for future in futures:
+        try:
+            future.result()
+        except Exception as e:
+            print(f"Market data prefetch failed: {e}")
+
+
 # =========================
 # LIVE TICKER
 # =========================
@@ -452,33 +524,9 @@ def render_live_ticker(fii_dii_source=None):
 # =========================
 # GAINER/LOSER BANNER
 # =========================
-def render_gainer_loser_banner():
-    """Render top gainer and loser banner from market indices with FII/DII data and weekly sectoral"""
-    indices_data = []
-    
-    # Combine all indices but exclude VIX and international indices
-    all_indices = {**INDICES_ROW1, **INDICES_ROW2}
-    exclude_list = ['India VIX', 'Dow Jones', 'NASDAQ']
-    
-    for name, symbol in all_indices.items():
-        if name not in exclude_list:
-            price, change = get_index_performance(symbol)
-            if price and change:
-                indices_data.append({
-                    'name': name,
-                    'change': change
-                })
-    
-    if not indices_data:
-        return
-    
-    # Find top gainer and loser
-    st.markdown("<br>", unsafe_allow_html=True)
-    top_gainer = max(indices_data, key=lambda x: x['change'])
-    top_loser = min(indices_data, key=lambda x: x['change'])
-    
-    # Fetch weekly sectoral data
-    import yfinance as yf
+@st.cache_data(ttl=900, show_spinner=False)  # 15 min cache - weekly moves change slowly
+def get_weekly_sectoral_changes():
+    """Fetch 1-week % change for each sectoral index"""
     sectoral_indices = {
         'Nifty Auto': '^CNXAUTO',
         'Nifty Energy': '^CNXENERGY',
@@ -492,14 +540,42 @@ def render_gainer_loser_banner():
     weekly_sectoral_data = []
     for name, symbol in sectoral_indices.items():
         try:
-            ticker = yf.Ticker(symbol)
+            ticker = get_ticker(symbol)
             hist = ticker.history(period='1wk')
-            if len(hist) >= 2:
-                week_change = ((hist['Close'].iloc[-1] - hist['Close'].iloc[0]) / hist['Close'].iloc[0]) * 100
+            if hist.shape[0] >= 2:
+                closes = hist['Close'].to_numpy()
+                week_change = ((closes[-1] - closes[0]) / closes[0]) * 100
                 weekly_sectoral_data.append({'name': name, 'change': week_change})
         except Exception as e:
             print(f"Error fetching weekly data for {name}: {e}")
             continue
+    return weekly_sectoral_data
+
+
+def render_gainer_loser_banner():
+    """Render top gainer and loser banner from market indices with FII/DII data and weekly sectoral"""
+    indices_data = []
+    
+    # All indices except VIX and international indices
+    index_performance = get_all_index_performance(INDEX_SYMBOLS)
+    for name, symbol in BANNER_INDEX_ITEMS:
+        price, change = index_performance[symbol]
+        if price and change:
+            indices_data.append({
+                'name': name,
+                'change': change
+            })
+    
+    if not indices_data:
+        return
+    
+    # Find top gainer and loser
+    st.markdown("<br>", unsafe_allow_html=True)
+    top_gainer = max(indices_data, key=lambda x: x['change'])
+    top_loser = min(indices_data, key=lambda x: x['change'])
+    
+    # Fetch weekly sectoral data
+    weekly_sectoral_data = get_weekly_sectoral_changes()
     
     # Find weekly sectoral gainer and loser
     weekly_gainer = None
@@ -608,6 +684,25 @@ def render_sidebar_info():
 # =========================
 # PERFORMERS & AVERAGES
 # =========================
+def _top_bottom_positions(values, k):
+    """Positions of the k largest and k smallest non-NaN values, best/worst first.
+
+    np.argpartition selects each side in O(n) instead of sorting the whole
+    column twice (nlargest + nsmallest); only the k picks get sorted.
+    """
+    valid = np.flatnonzero(~np.isnan(values))
+    k = min(k, len(valid))
+    if k == 0:
+        return valid, valid
+    vals = values[valid]
+    top = valid[np.argpartition(-vals, k - 1)[:k]]
+    bottom = valid[np.argpartition(vals, k - 1)[:k]]
+    # lexsort's last key is primary; row position breaks ties like keep='first'
+    top = top[np.lexsort((top, -values[top]))]
+    bottom = bottom[np.lexsort((bottom, values[bottom]))]
+    return top, bottom
+
+
 def render_top_bottom_performers(df):
     """Render top and bottom performers section"""
     st.markdown("---")
@@ -642,20 +737,22 @@ def render_top_bottom_performers(df):
     <div class="performers-section">
     """, unsafe_allow_html=True)
     
+    names = df['Stock Name'].to_numpy()
+    changes = df['3 Months %'].to_numpy(dtype=float)
+    top_3, bottom_3 = _top_bottom_positions(changes, 3)
+
     # Two columns on desktop, stacked on mobile
     col_top, col_bottom = st.columns(2)
     
     with col_top:
         st.markdown("**🔝 Top 3 Performers**")
-        top_3 = df.nlargest(3, '3 Months %')[['Stock Name', '3 Months %']]
-        for idx, row in top_3.iterrows():
-            st.success(f"**{row['Stock Name']}**: +{row['3 Months %']}%")
+        for name, change in zip(names[top_3], changes[top_3].tolist()):
+            st.success(f"**{name}**: +{round(change, 2)}%")
     
     with col_bottom:
         st.markdown("**🔻 Bottom 3 Performers**")
-        bottom_3 = df.nsmallest(3, '3 Months %')[['Stock Name', '3 Months %']]
-        for idx, row in bottom_3.iterrows():
-            st.error(f"**{row['Stock Name']}**: {row['3 Months %']}%")
+        for name, change in zip(names[bottom_3], changes[bottom_3].tolist()):
+            st.error(f"**{name}**: {round(change, 2)}%")
     
     # Close performers section
     st.markdown("</div>", unsafe_allow_html=True)
@@ -663,7 +760,6 @@ def render_top_bottom_performers(df):
 
 def render_averages(df):
     """Render key index 1-year performance"""
-    import yfinance as yf
     from datetime import datetime, timedelta
     
     st.markdown("---")
@@ -686,15 +782,16 @@ def render_averages(df):
     for idx, (name, symbol) in enumerate(indices.items()):
         with cols[idx]:
             try:
-                ticker = yf.Ticker(symbol)
+                ticker = get_ticker(symbol)
                 end_date = datetime.now()
                 start_date = end_date - timedelta(days=365)
                 
                 hist = ticker.history(start=start_date, end=end_date)
                 
                 if not hist.empty and len(hist) > 1:
-                    start_price = hist['Close'].iloc[0]
-                    end_price = hist['Close'].iloc[-1]
+                    closes = hist['Close'].to_numpy()
+                    start_price = closes[0]
+                    end_price = closes[-1]
                     year_change = ((end_price - start_price) / start_price) * 100
                     
                     # Calculate 52-week high and low
@@ -790,7 +887,10 @@ def render_averages(df):
 # PAGINATION
 # =========================
 def render_pagination_controls(total_items, items_per_page, position="top", csv_data=None, csv_filename=None):
-    """Render pagination controls with optional CSV download and return current page data range"""
+    """Render pagination controls with optional CSV download and return current page data range.
+
+    csv_data may be bytes or a zero-arg callable; a callable is only invoked when Download is clicked.
+    """
     total_pages = max(1, (total_items + items_per_page - 1) // items_per_page) if total_items > 0 else 1
 
     if 'current_page' not in st.session_state:
@@ -837,7 +937,7 @@ def render_pagination_controls(total_items, items_per_page, position="top", csv_
         if st.button("◄", disabled=is_first_page, key=f"prev_page_{position}"):
             if st.session_state.current_page > 1:
                 st.session_state.current_page -= 1
-                st.rerun()
+                st.rerun(scope="fragment")
     
     start_idx = (st.session_state.current_page - 1) * items_per_page
     end_idx = min(start_idx + items_per_page, total_items)
@@ -924,7 +1024,7 @@ def render_pagination_controls(total_items, items_per_page, position="top", csv_
         if st.button("►", disabled=is_last_page, key=f"next_page_{position}"):
             if st.session_state.current_page < total_pages:
                 st.session_state.current_page += 1
-                st.rerun()
+                st.rerun(scope="fragment")
     
     # Close pagination container
     st.markdown("</div>", unsafe_allow_html=True)
@@ -932,13 +1032,38 @@ def render_pagination_controls(total_items, items_per_page, position="top", csv_
     return start_idx, end_idx
 
 
+def _percent_cell_styles(frame):
+    """CSS for percent cells: green gains, red losses (one vectorized np.where per page)"""
+    values = frame.to_numpy(dtype=float)
+    css = np.where(values > 0, f'color: {COLOR_GREEN}; font-weight: bold',
+                   np.where(values < 0, f'color: {COLOR_RED}; font-weight: bold', ''))
+    return pd.DataFrame(css, index=frame.index, columns=frame.columns)
+
+
+def render_native_table(df_page):
+    """Render a results page with st.dataframe (Arrow) instead of the HTML table"""
+    column_config = {
+        'Rank': st.column_config.NumberColumn('Rank', format='%d', width='small'),
+        'sparkline_data': st.column_config.LineChartColumn('Trend', width='small'),
+    }
+    percent_cols = [col for col in PERCENT_COLUMNS if col in df_page.columns]
+    # Same gain/loss colors as color_percentage, applied client-side via the Styler
+    styled = (
+        df_page.style
+        .apply(_percent_cell_styles, subset=percent_cols, axis=None)
+        .format('{:+.2f}%', subset=percent_cols, na_rep='')
+    )
+    if 'Current Price' in df_page.columns:
+        styled = styled.format('₹{:.2f}', subset=['Current Price'], na_rep='')
+    st.dataframe(styled, hide_index=True, width='stretch', column_config=column_config)
+
+
 # =========================
 # SECTORAL YEARLY PERFORMANCE
 # =========================
 @st.cache_data(ttl=86400, show_spinner=False)  # Cache 24 hours - 1-year performance updates once daily post-market
 def fetch_sectoral_yearly_data():
     """Fetch 1-year data for sectoral indices only (not main indices)"""
-    import yfinance as yf
     from datetime import datetime, timedelta
     import time
     
@@ -960,14 +1085,15 @@ def fetch_sectoral_yearly_data():
         max_retries = 2
         for attempt in range(max_retries):
             try:
-                ticker = yf.Ticker(symbol)
+                ticker = get_ticker(symbol)
                 
                 # Use period instead of start/end for better reliability
                 hist = ticker.history(period='1y')
                 
                 if not hist.empty and len(hist) > 20:  # Ensure sufficient data
-                    start_price = hist['Close'].iloc[0]
-                    end_price = hist['Close'].iloc[-1]
+                    closes = hist['Close'].to_numpy()
+                    start_price = closes[0]
+                    end_price = closes[-1]
                     year_change = ((end_price - start_price) / start_price) * 100
                     
                     # Calculate 52-week high and low
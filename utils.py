@@ -3,12 +3,14 @@ Utility Functions for NSE Stock Performance Tracker
 Helper functions for formatting, coloring, and data processing
 """
 
+import re
 from datetime import datetime
+from functools import lru_cache
 import pytz
 import streamlit as st
 import pandas as pd
 import yfinance as yf
-from data_fetchers import get_stock_list
+from data_fetchers import get_stock_list, YF_DOWNLOAD_LOCK
 
 # Color constants for consistency
 COLOR_GREEN = '#00FFA3'  # Mint green for gains
@@ -21,18 +23,46 @@ PRE_OPEN_START = 9 * 60      # 9:00 AM
 MARKET_OPEN = 9 * 60 + 15     # 9:15 AM
 MARKET_CLOSE = 15 * 60 + 30   # 3:30 PM
 
+# Columns rendered through color_percentage in the results table
+PERCENT_COLUMNS = ('Today %', '1 Week %', '1 Month %', '2 Months %', '3 Months %')
+
 def color_percentage(val):
     """Color code percentage values for HTML display"""
     try:
-        num_val = float(val)
-        if num_val > 0:
-            return f'<span style="color: {COLOR_GREEN}; font-weight: bold;">+{num_val}%</span>'
-        elif num_val < 0:
-            return f'<span style="color: {COLOR_RED}; font-weight: bold;">{num_val}%</span>'
-        else:
-            return f'<span style="color: {COLOR_NEUTRAL};">{num_val}%</span>'
-    except:
+        num_val = round(float(val), 2)
+    except (TypeError, ValueError):
         return val
+    return _percentage_span(num_val)
+
+
+@lru_cache(maxsize=4096)
+def _percentage_span(num_val):
+    """Memoized HTML span for a 2 dp percentage (few distinct values per table)"""
+    if num_val > 0:
+        return f'<span style="color: {COLOR_GREEN}; font-weight: bold;">+{num_val}%</span>'
+    elif num_val < 0:
+        return f'<span style="color: {COLOR_RED}; font-weight: bold;">{num_val}%</span>'
+    else:
+        # + 0.0 turns -0.0 into 0.0; both hash to the same cache entry
+        return f'<span style="color: {COLOR_NEUTRAL};">{num_val + 0.0}%</span>'
+
+
+def minify_css(css):
+    """Strip comments and collapse whitespace in a <style> block.
+
+    Style blocks are re-sent over the websocket on every rerun (skipping them
+    would drop them from the page), so shrink them once at import instead.
+    """
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+    return re.sub(r'\s+', ' ', css).strip()
+
+
+def format_price(val):
+    """Format a numeric price as ₹ with 2 decimals (pre-formatted strings pass through)"""
+    try:
+        return f"₹{float(val):.2f}"
+    except (TypeError, ValueError):
+        return str(val)
 
 
 def get_current_times():
@@ -275,54 +305,81 @@ def create_html_table(df_page):
     """Create HTML table with colored percentage values and mini charts"""
     import html as html_lib
     
-    html_table = ''
-    html_table += '''<div style="overflow-x: auto; -webkit-overflow-scrolling: touch;">
-    <table style="width:100%; border-collapse: collapse; background-color: #2d2d2d; font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, 'Helvetica Neue', Arial, sans-serif;">'''
-    html_table += '<thead><tr style="background-color: #3d3d3d;">'
-    
+    columns = list(df_page.columns)
+    visible = [col for col in columns if col != 'sparkline_data']  # Skip the raw data column
+
+    parts = ['''<div style="overflow-x: auto; -webkit-overflow-scrolling: touch;">
+    <table style="width:100%; border-collapse: collapse; background-color: #2d2d2d; font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, 'Helvetica Neue', Arial, sans-serif;">''']
+    parts.append('<thead><tr style="background-color: #3d3d3d;">')
+
     # Add "Chart" column header after "Stock Name"
-    for col in df_page.columns:
-        if col != 'sparkline_data':  # Skip the raw data column
-            # SECURITY FIX: Escape column names to prevent XSS
-            safe_col = html_lib.escape(str(col))
-            html_table += f'<th style="padding: 12px; text-align: left; border: 1px solid #555; color: #ffffff; font-weight: bold; font-size: 14px;">{safe_col}</th>'
-            if col == 'Stock Name':
-                html_table += '<th style="padding: 12px; text-align: center; border: 1px solid #555; color: #ffffff; font-weight: bold; font-size: 14px;">Chart</th>'
-    
-    html_table += '</tr></thead><tbody>'
-    
-    for _, row in df_page.iterrows():
-        html_table += '<tr>'
-        stock_symbol = row.get('Stock Name', '')
-        sparkline_data = row.get('sparkline_data', [])
-        today_change = row.get('Today %', 0)  # Get today's performance for color
-        
-        for col in df_page.columns:
-            if col == 'sparkline_data':
-                continue  # Skip the raw data column
-                
-            value = row[col]
-            
-            if col in ['Today %', '1 Week %', '1 Month %', '2 Months %', '3 Months %']:
-                # colored_value already includes HTML, so it's safe (trusted internal function)
-                colored_value = color_percentage(value)
-                html_table += f'<td style="padding: 12px; border: 1px solid #555; color: #ffffff; font-size: 14px;">{colored_value}</td>'
-            else:
-                # SECURITY FIX: Escape all other cell values to prevent XSS
-                safe_value = html_lib.escape(str(value))
-                html_table += f'<td style="padding: 12px; border: 1px solid #555; color: #ffffff; font-size: 14px;">{safe_value}</td>'
-            
-            # Add sparkline cell after Stock Name
-            if col == 'Stock Name':
-                sparkline_svg = create_sparkline_svg(sparkline_data, today_change, stock_symbol)
-                html_table += f'''<td style="text-align: center; padding: 12px; border: 1px solid #555;">
-                    {sparkline_svg}
+    for col in visible:
+        # SECURITY FIX: Escape column names to prevent XSS
+        safe_col = html_lib.escape(str(col))
+        parts.append(f'<th style="padding: 12px; text-align: left; border: 1px solid #555; color: #ffffff; font-weight: bold; font-size: 14px;">{safe_col}</th>')
+        if col == 'Stock Name':
+            parts.append('<th style="padding: 12px; text-align: center; border: 1px solid #555; color: #ffffff; font-weight: bold; font-size: 14px;">Chart</th>')
+
+    parts.append('</tr></thead><tbody>')
+
+    # Format cells column by column (one formatter per column instead of a
+    # per-cell branch), then stitch rows together with a single join each
+    cell_open = '<td style="padding: 12px; border: 1px solid #555; color: #ffffff; font-size: 14px;">'
+    cell_columns = []
+    for col in visible:
+        if col in PERCENT_COLUMNS:
+            # colored_value already includes HTML, so it's safe (trusted internal function)
+            formatter = color_percentage
+        elif col == 'Current Price':
+            formatter = lambda value: html_lib.escape(format_price(value))
+        else:
+            # SECURITY FIX: Escape all other cell values to prevent XSS
+            formatter = lambda value: html_lib.escape(str(value))
+        cell_columns.append([f'{cell_open}{formatter(value)}</td>' for value in df_page[col].tolist()])
+
+        # Add sparkline cell after Stock Name
+        if col == 'Stock Name':
+            names = df_page[col].tolist()
+            sparklines = df_page['sparkline_data'].tolist() if 'sparkline_data' in columns else [[]] * len(df_page)
+            today_changes = df_page['Today %'].tolist() if 'Today %' in columns else [0] * len(df_page)  # Today's performance sets the color
+            cell_columns.append([
+                f'''<td style="text-align: center; padding: 12px; border: 1px solid #555;">
+                    {create_sparkline_svg(data, change, name)}
                 </td>'''
-        
-        html_table += '</tr>'
+                for name, data, change in zip(names, sparklines, today_changes)
+            ])
+
+    parts.extend(f"<tr>{''.join(cells)}</tr>" for cells in zip(*cell_columns))
+
+    parts.append('</tbody></table></div>')
+    return ''.join(parts)
+
+
+def make_list_key(stocks):
+    """Generate a unique hash key for a list of stock symbols.
     
-    html_table += '</tbody></table></div>'
-    return html_table
+    Args:
+        stocks: List of stock symbol strings
+        
+    Returns:
+        Hex digest string for cache key lookup
+    """
+    if not stocks:
+        return "empty"
+    # The list is rebuilt every rerun but rarely changes, so memoize on its
+    # contents: a tuple hash reuses each str's cached hash, skipping the sort/digest.
+    # Lives here (not app.py, which Streamlit re-executes every rerun) so the
+    # lru_cache survives across reruns
+    return _list_key(tuple(stocks))
+
+
+@lru_cache(maxsize=8)
+def _list_key(stocks):
+    """Digest for make_list_key (order-insensitive; memoized per distinct list)."""
+    ordered = sorted(stocks)
+    # Keys only live in session_state, so the per-process seeded hash() is
+    # stable enough and avoids encoding + SHA-1 on every rerun
+    return format(hash(tuple(ordered)) & 0xFFFFFFFFFFFFFFFF, "016x")
 
 
 def _is_market_open():
@@ -370,15 +427,16 @@ def _fetch_ticker_data_internal():
     
     try:
         # Use bulk download for much faster fetching (10-50x speedup)
-        data = yf.download(
-            tickers=stocks_to_fetch,
-            period='2d',
-            interval='1d',
-            group_by='ticker',
-            progress=False,
-            auto_adjust=True,
-            threads=True
-        )
+        with YF_DOWNLOAD_LOCK:
+            data = yf.download(
+                tickers=stocks_to_fetch,
+                period='2d',
+                interval='1d',
+                group_by='ticker',
+                progress=False,
+                auto_adjust=True,
+                threads=True
+            )
         
         if data.empty:
             return []
@@ -395,11 +453,12 @@ def _fetch_ticker_data_internal():
                 if close_series.empty:
                     continue
                 
-                if len(close_series) >= 2:
-                    current_price = float(close_series.iloc[-1])
-                    prev_close = float(close_series.iloc[-2])
+                closes = close_series.to_numpy()
+                if closes.shape[0] >= 2:
+                    current_price = float(closes[-1])
+                    prev_close = float(closes[-2])
                     change_pct = ((current_price - prev_close) / prev_close) * 100
-                elif len(close_series) == 1:
+                elif closes.shape[0] == 1:
                     # Try to get open price for single-day data
                     if is_multi and len(stocks_to_fetch) > 1:
                         open_series = data[(symbol, 'Open')].dropna()
@@ -407,8 +466,8 @@ def _fetch_ticker_data_internal():
                         open_series = data['Open'].dropna() if 'Open' in data.columns else pd.Series()
                     
                     if not open_series.empty:
-                        current_price = float(close_series.iloc[-1])
-                        open_price = float(open_series.iloc[-1])
+                        current_price = float(closes[-1])
+                        open_price = float(open_series.to_numpy()[-1])
                         if open_price > 0:
                             change_pct = ((current_price - open_price) / open_price) * 100
                         else:
@@ -460,9 +519,10 @@ def _fetch_ticker_data_fallback(stocks_to_fetch):
             
             # Fallback to history
             hist = ticker.history(period='2d')
-            if len(hist) >= 2:
-                current_price = hist['Close'].iloc[-1]
-                prev_close = hist['Close'].iloc[-2]
+            if hist.shape[0] >= 2:
+                closes = hist['Close'].to_numpy()
+                current_price = closes[-1]
+                prev_close = closes[-2]
                 change_pct = ((current_price - prev_close) / prev_close) * 100
                 return {
                     'symbol': symbol.replace('.NS', '').replace('.BO', ''),
@@ -40,7 +40,7 @@ def get_all_nse_stocks():
     return sorted(list(all_stocks))
 
 
-@st.cache_data(ttl=300, show_spinner=False)  # Cache for 5 minutes
+@st.cache_data(ttl=300, show_spinner=False, max_entries=32)  # Cache for 5 minutes
 def get_portfolio_current_prices(holdings_tuple):
     """
     Fetch current prices for all portfolio holdings.
@@ -59,9 +59,11 @@ def get_portfolio_current_prices(holdings_tuple):
         try:
             data = get_stock_performance(symbol, use_cache=True)
             if data and 'Current Price' in data:
-                # Extract numeric value from formatted string like "₹1,234.56"
-                price_str = data['Current Price'].replace('₹', '').replace(',', '')
-                current_prices[symbol] = float(price_str)
+                price = data['Current Price']
+                if isinstance(price, str):
+                    # Rows from older caches hold formatted strings like "₹1,234.56"
+                    price = price.replace('₹', '').replace(',', '')
+                current_prices[symbol] = float(price)
             else:
                 # API returned data but no current price
                 price_fetch_errors.append(f"{symbol}: No price data available")